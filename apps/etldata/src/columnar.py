@@ -0,0 +1,200 @@
+import json
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 1
+META_FILE = 'meta.json'
+CHECKPOINT_FILE = 'checkpoint.json'
+
+
+def _publish(tmp, path):
+    """
+    Move directory <tmp> to <path>. A dataset already at <path> is first renamed aside and only
+    removed once the new one is in place, so <path> always holds one complete dataset.
+    """
+    aside = None
+    if os.path.exists(path):
+        aside = tempfile.mkdtemp(dir=os.path.dirname(os.path.abspath(path)), prefix='.old-')
+        os.replace(path, os.path.join(aside, 'old'))
+    try:
+        os.replace(tmp, path)
+    except OSError:
+        if aside is not None:
+            os.replace(os.path.join(aside, 'old'), path)
+            os.rmdir(aside)
+        raise
+    if aside is not None:
+        shutil.rmtree(aside, ignore_errors=True)
+
+
+class ColumnWriter:
+    """
+    Append-only writer of a columnar dataset: one raw binary file per column plus meta.json.
+    Text columns are stored as int32 codes into a category list that grows across chunks.
+    Everything is written to a temporary directory next to <path> and moved into place on close(),
+    so readers never see a partial dataset. Extra <meta> entries are saved in meta.json.
+    With a <work_dir>, that directory is used instead and survives failures, so that a writer
+    can be resumed from its last checkpoint().
+    """
+
+    def __init__(self, path, dtypes=None, work_dir=None, **meta):
+        self.path = path
+        self.dtypes = dict(dtypes or {})
+        self.meta = meta
+        self.rows = 0
+        self.extra = dict()
+        self._columns = None
+        self._done = False
+        self._keep = work_dir is not None
+        if work_dir is not None:
+            os.makedirs(work_dir, exist_ok=True)
+            self._tmp = work_dir
+        else:
+            parent = os.path.dirname(os.path.abspath(path))
+            os.makedirs(parent, exist_ok=True)
+            self._tmp = tempfile.mkdtemp(dir=parent, prefix='.tmp-')
+
+    @classmethod
+    def resume(cls, path, work_dir, dtypes=None, **meta):
+        """
+        Writer continuing from the last checkpoint in <work_dir>, or a fresh one if there is none.
+        Bytes written after the checkpoint are dropped; <extra> holds what was passed to checkpoint().
+        """
+        writer = cls(path, dtypes, work_dir, **meta)
+        try:
+            with open(os.path.join(work_dir, CHECKPOINT_FILE)) as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return writer
+
+        writer.rows, writer.extra = state['rows'], state['extra']
+        writer._columns = dict()
+        for n, c in enumerate(state['columns']):
+            f = open(os.path.join(work_dir, f'{n}.bin'), 'r+b')
+            f.truncate(c['size'])
+            f.seek(c['size'])
+            writer._columns[c['name']] = {'file': f, 'dtype': np.dtype(c['dtype']),
+                                          'categories': {v: i for i, v in enumerate(c['categories'])} if c['categories'] is not None else None}
+        return writer
+
+    def _describe(self):
+        return [{'name': name, 'dtype': c['dtype'].str,
+                 'categories': list(c['categories']) if c['categories'] is not None else None}
+                for name, c in (self._columns or {}).items()]
+
+    def checkpoint(self, **extra):
+        """Flush everything written so far and record it, with <extra>, as a point resume() restarts from"""
+        columns = self._describe()
+        for c, d in zip((self._columns or {}).values(), columns):
+            c['file'].flush()
+            os.fsync(c['file'].fileno())
+            d['size'] = c['file'].tell()
+        self.extra = extra
+        tmp = os.path.join(self._tmp, CHECKPOINT_FILE + '.tmp')
+        with open(tmp, 'w') as f:
+            json.dump({'rows': self.rows, 'columns': columns, 'extra': extra}, f)
+        os.replace(tmp, os.path.join(self._tmp, CHECKPOINT_FILE))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+    def _init(self, df):
+        self._columns = dict()
+        for n, (name, col) in enumerate(df.items()):
+            dtype = self.dtypes.get(name)
+            if dtype is None:
+                dtype = col.dtype if col.dtype.kind in 'biuf' else 'category'
+            elif dtype in ('str', 'object', 'category'):
+                dtype = 'category'
+            self._columns[name] = {'file': open(os.path.join(self._tmp, f'{n}.bin'), 'wb'),
+                                   'dtype': np.dtype(np.int32) if dtype == 'category' else np.dtype(dtype),
+                                   'categories': dict() if dtype == 'category' else None}
+
+    def write(self, df):
+        """Append the rows of <df>; its columns must match those of the first chunk"""
+        if self._columns is None:
+            self._init(df)
+        if list(df.columns) != list(self._columns):
+            raise ValueError(f'Columns {list(df.columns)} do not match {list(self._columns)}')
+
+        for name, col in df.items():
+            c = self._columns[name]
+            if c['categories'] is not None:
+                codes, uniques = pd.factorize(col)
+                lookup = np.array([c['categories'].setdefault(str(u), len(c['categories'])) for u in uniques] + [-1], dtype=np.int32)
+                values = lookup[codes]
+            else:
+                values = col.to_numpy()
+                if values.dtype != c['dtype'] and not np.can_cast(values.dtype, c['dtype']):
+                    raise ValueError(f'Column {name} is {values.dtype} in this chunk but stored as {c["dtype"]}; set its dtype in the mapping')
+                values = values.astype(c['dtype'], copy=False)
+            c['file'].write(np.ascontiguousarray(values).tobytes())
+        self.rows += len(df)
+
+    def close(self):
+        """Write meta.json and publish the dataset at <path>"""
+        if self._done:
+            return
+        self._done = True
+        columns = self._describe()
+        for c in (self._columns or {}).values():
+            c['file'].close()
+
+        if os.path.exists(os.path.join(self._tmp, CHECKPOINT_FILE)):
+            os.remove(os.path.join(self._tmp, CHECKPOINT_FILE))
+        with open(os.path.join(self._tmp, META_FILE), 'w') as f:
+            json.dump({'version': FORMAT_VERSION, 'rows': self.rows, 'columns': columns, **self.meta}, f)
+
+        _publish(self._tmp, self.path)
+
+    def abort(self):
+        """Stop writing; the temporary directory is removed unless it is a resumable work_dir"""
+        if self._done:
+            return
+        self._done = True
+        for c in (self._columns or {}).values():
+            c['file'].close()
+        if not self._keep:
+            shutil.rmtree(self._tmp, ignore_errors=True)
+
+    def discard(self):
+        """Stop writing and remove the temporary directory, checkpoints included"""
+        self.abort()
+        shutil.rmtree(self._tmp, ignore_errors=True)
+
+
+def read_meta(path):
+    with open(os.path.join(path, META_FILE)) as f:
+        return json.load(f)
+
+
+def read_columns(path, columns=None, rows=None):
+    """
+    Columns of a dataset written by ColumnWriter; numeric ones are memory-mapped, text ones decoded.
+    With <rows> (indices or a slice), only those rows are read from the mapped files and decoded.
+    """
+    meta = read_meta(path)
+    n_rows, cols = meta['rows'], dict()
+    for n, c in enumerate(meta['columns']):
+        if columns is not None and c['name'] not in columns:
+            continue
+        dtype = np.dtype(c['dtype'])
+        values = np.memmap(os.path.join(path, f'{n}.bin'), dtype=dtype, mode='r', shape=(n_rows,)) if n_rows else np.empty(0, dtype)
+        values = np.asarray(values if rows is None else values[rows])
+        if c['categories'] is not None:
+            values = np.array(c['categories'] + [np.nan], dtype=object)[values]
+        cols[c['name']] = values
+    return cols
+
+
+def read_frame(path, columns=None, rows=None):
+    return pd.DataFrame(read_columns(path, columns, rows), copy=False)
@@ -4,6 +4,8 @@ import logging
 import os
 import sys
 from types import SimpleNamespace as Namespace
+import extraction
+import transformation
 
 RETURN_SUCCESS = 0
 RETURN_FAILURE = 1
@@ -15,18 +17,14 @@ def main(argv):
         # Parse command line arguments.
         args, process_name, feature_type, feature_config = _interpret_args(argv)
 
-        # Initialize standard logging \ destination file handlers.
-        # TODO: Finish/fix logging below.
-        std_filename = "c:\\temp\\opendata.log"
-        logging.basicConfig(filename=std_filename, filemode='a', format='%(asctime)s - %(message)s')
+        # Initialize standard logging \ destination file handlers; stderr unless -log is given.
+        logging.basicConfig(filename=args.log_path, filemode='a', format='%(asctime)s - %(message)s', level=logging.INFO)
         logging.info('')
         logging.info(f'Entering {APP}')
 
         # Preparation step.
-        # TODO: Change below initializations to be conversion
-        #  from Namespace to dict (args, feature_config).
-        mapping_args = dict()
-        mapping_conf = dict()
+        mapping_args = vars(args)
+        mapping_conf = _to_dict(feature_config)
 
         # Workflow steps.
         if feature_type == 'extraction':
@@ -66,7 +64,7 @@ def _interpret_args(argv):
     process_name = process_args[0]
     feature_type = process_args[1]
     current_path = os.path.realpath(os.path.join(os.getcwd(), os.path.dirname(__file__)))
-    with open(os.path.join(current_path, f'..\\config\\{process_name}.json')) as file_config:
+    with open(os.path.join(current_path, '..', 'config', f'{process_name}.json')) as file_config:
         mapping_config = json.load(file_config, object_hook=lambda d: Namespace(**d))
         if feature_type == 'extraction':
             feature_config = vars(mapping_config.extraction)
@@ -83,12 +81,23 @@ def _interpret_args(argv):
     return arg_parser.parse_args(argv), process_name, feature_type, feature_config
 
 
+def _to_dict(value):
+    """Recursively convert Namespace objects from the JSON config into dicts"""
+    if isinstance(value, Namespace):
+        value = vars(value)
+    if isinstance(value, dict):
+        return {k: _to_dict(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_to_dict(v) for v in value]
+    return value
+
+
 def run_extraction(args, conf):
-    pass
+    return extraction.run(args, conf)
 
 
 def run_transformation(args, conf):
-    pass
+    return transformation.run(args, conf)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,134 @@
+import glob
+import json
+import logging
+import os
+import time
+import pandas as pd
+from columnar import ColumnWriter
+from manifest import Manifest, settings_hash
+
+DEFAULT_CHUNKSIZE = 100000
+WORK_DIR = '.work'
+TEXT_TYPES = ('str', 'object', 'category')
+
+
+def load_mapping(mapping_path):
+    """
+    Read a column mapping file: a JSON object of source column to either a target name
+    or {"name": target, "dtype": numpy dtype or "str"}. Unmapped source columns are dropped.
+    :param mapping_path: JSON mapping file.
+    :return: Source column -> (target name, dtype or None), in file order.
+    """
+    with open(mapping_path) as f:
+        raw = json.load(f)
+    mapping = dict()
+    for source, target in raw.items():
+        if isinstance(target, str):
+            mapping[source] = (target, None)
+        else:
+            mapping[source] = (target.get('name', source), target.get('dtype'))
+    return mapping
+
+
+def compile_plan(mapping):
+    """
+    Turn a mapping into the arguments of one chunked read: columns to parse, parser dtypes and renames.
+    Text columns are parsed as str so chunks never disagree on their type.
+    """
+    usecols = list(mapping)
+    dtype = {s: (str if d in TEXT_TYPES else d) for s, (_, d) in mapping.items() if d is not None}
+    rename = {s: t for s, (t, _) in mapping.items()}
+    out_dtypes = {t: d for t, d in mapping.values() if d is not None}
+    return {'usecols': usecols, 'dtype': dtype}, rename, out_dtypes
+
+
+def input_files(input_path, pattern='*'):
+    """<input_path> itself if it is a file, else its files matching <pattern> in name order"""
+    if os.path.isfile(input_path):
+        return [input_path]
+    return sorted(f for f in glob.glob(os.path.join(input_path, pattern)) if os.path.isfile(f))
+
+
+def output_dir(output_path, input_file):
+    return os.path.join(output_path, os.path.splitext(os.path.basename(input_file))[0])
+
+
+def extract_file(input_file, output, mapping, sep=',', chunksize=DEFAULT_CHUNKSIZE, work_dir=None, checkpoint=None):
+    """
+    Stream one delimited file into a columnar dataset at <output>, <chunksize> rows at a time.
+    With a <work_dir>, progress is checkpointed after every chunk and a later call with the same
+    <checkpoint> key resumes after the last completed chunk instead of starting over.
+    Resuming counts lines, so inputs must not contain quoted line breaks.
+    :return: Number of rows written.
+    """
+    read_args, rename, out_dtypes = compile_plan(mapping)
+    meta = {'source': os.path.basename(input_file), 'checkpoint': checkpoint}
+
+    if work_dir is None:
+        writer = ColumnWriter(output, out_dtypes, **meta)
+    else:
+        writer = ColumnWriter.resume(output, work_dir, out_dtypes, **meta)
+        if writer.extra.get('checkpoint') != checkpoint:
+            writer.discard()
+            writer = ColumnWriter(output, out_dtypes, work_dir, **meta)
+        elif writer.rows:
+            logging.info(f'Resuming {input_file} after {writer.rows} rows')
+
+    header = list(pd.read_csv(input_file, sep=sep, nrows=0).columns)
+    with writer:
+        for chunk in pd.read_csv(input_file, sep=sep, chunksize=chunksize, header=None, names=header, skiprows=writer.rows + 1, **read_args):
+            writer.write(chunk[list(rename)].rename(columns=rename))
+            if work_dir is not None:
+                writer.checkpoint(checkpoint=checkpoint)
+    return writer.rows
+
+
+def run(args, conf):
+    """
+    Extraction stage: every input file to its own columnar dataset under the output path.
+    Unless 'incremental' is false in <conf>, files whose content, config and mapping are unchanged
+    since the run recorded in the output manifest are skipped, and a file interrupted mid-way
+    resumes from its last checkpointed chunk.
+    :param args: Parsed command line arguments (input_path, output_path, mapping_path).
+    :param conf: 'extraction' section of the process config.
+    :return: Summary with files processed and skipped, rows, seconds and rows per second.
+    """
+    input_conf = conf['input']
+    if input_conf.get('file_type', 'csv') != 'csv':
+        raise ValueError(f"Unsupported input file type: [{input_conf['file_type']}]")
+    sep = input_conf.get('sep', ',')
+    chunksize = int(input_conf.get('chunksize', DEFAULT_CHUNKSIZE))
+
+    mapping = load_mapping(args['mapping_path'])
+    files = input_files(args['input_path'], input_conf.get('pattern', '*'))
+    if not files:
+        raise FileNotFoundError(f"No input files at {args['input_path']}")
+
+    incremental = conf.get('incremental', True)
+    manifest = Manifest(args['output_path'], 'extraction')
+    settings = settings_hash(conf=conf, mapping=mapping)
+
+    start, rows, skipped = time.perf_counter(), 0, 0
+    for input_file in files:
+        output = output_dir(args['output_path'], input_file)
+        fingerprint = manifest.fingerprint(input_file)
+        if incremental and manifest.unchanged(input_file, fingerprint, settings):
+            logging.info(f'Skipped unchanged {input_file}')
+            skipped += 1
+            continue
+
+        file_start = time.perf_counter()
+        work_dir = os.path.join(args['output_path'], WORK_DIR, os.path.basename(output)) if incremental else None
+        n = extract_file(input_file, output, mapping, sep, chunksize, work_dir, f"{fingerprint['sha256']}:{settings}")
+        elapsed = time.perf_counter() - file_start
+        logging.info(f'Extracted {n} rows from {input_file} in {elapsed:.2f}s ({n / elapsed if elapsed else 0:.0f} rows/sec)')
+        rows += n
+
+        manifest.record(input_file, fingerprint, settings, [output], rows=n)
+        manifest.save()
+    manifest.save()
+
+    elapsed = time.perf_counter() - start
+    summary = {'files': len(files) - skipped, 'skipped': skipped, 'rows': rows, 'seconds': elapsed, 'rows_per_sec': rows / elapsed if elapsed else 0.0}
+    logging.info(f"Extraction done: {summary['files']} files, {skipped} skipped, {rows} rows, {summary['rows_per_sec']:.0f} rows/sec")
+    return summary
@@ -0,0 +1,80 @@
+import hashlib
+import json
+import os
+import time
+
+MANIFEST_VERSION = 1
+MANIFEST_FILE = 'manifest.json'
+
+
+def content_hash(path, block=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(block), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def settings_hash(**settings):
+    """Hash of everything besides the input that shapes the output, e.g. config section and mapping"""
+    return hashlib.sha256(json.dumps(settings, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class Manifest:
+    """
+    Record of a stage's previous runs, kept as manifest.json in its output directory.
+    Each input is stored with its size, mtime and content hash, the settings hash it was
+    processed with, and the outputs it produced. Size and mtime are checked first; the
+    content is only hashed again when they differ.
+    """
+
+    def __init__(self, output_path, stage):
+        self.path = os.path.join(output_path, MANIFEST_FILE)
+        self.stage = stage
+        self.entries = dict()
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            if data.get('version') == MANIFEST_VERSION:
+                self.entries = data.get('stages', dict()).get(stage, dict())
+            self._stages = data.get('stages', dict())
+        except (OSError, ValueError):
+            self._stages = dict()
+
+    @staticmethod
+    def _key(input_file):
+        return os.path.abspath(input_file)
+
+    def fingerprint(self, input_file):
+        """Size, mtime and content hash of <input_file>, reusing the recorded hash if size and mtime match"""
+        st = os.stat(input_file)
+        entry = self.entries.get(self._key(input_file))
+        if entry is not None and entry['size'] == st.st_size and entry['mtime'] == st.st_mtime_ns:
+            digest = entry['sha256']
+        else:
+            digest = content_hash(input_file)
+        return {'size': st.st_size, 'mtime': st.st_mtime_ns, 'sha256': digest}
+
+    def unchanged(self, input_file, fingerprint, settings):
+        """True if <input_file> was processed with the same content and settings, and its outputs still exist"""
+        entry = self.entries.get(self._key(input_file))
+        if entry is None or entry['sha256'] != fingerprint['sha256'] or entry['settings'] != settings:
+            return False
+        if not all(os.path.exists(o) for o in entry['outputs']):
+            return False
+        # Same content under a new mtime: remember it so the next check skips hashing.
+        entry.update(size=fingerprint['size'], mtime=fingerprint['mtime'])
+        return True
+
+    def record(self, input_file, fingerprint, settings, outputs, **info):
+        self.entries[self._key(input_file)] = {**fingerprint, 'settings': settings, 'outputs': list(outputs),
+                                               'completed': time.strftime('%Y-%m-%dT%H:%M:%S'), **info}
+
+    def save(self):
+        """Write the manifest atomically"""
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._stages[self.stage] = self.entries
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'version': MANIFEST_VERSION, 'stages': self._stages}, f, indent=2)
+        os.replace(tmp, self.path)
@@ -0,0 +1,152 @@
+import logging
+import multiprocessing as mp
+import os
+import time
+import numpy as np
+from columnar import ColumnWriter, read_frame, read_meta, META_FILE
+from extraction import load_mapping, TEXT_TYPES
+from manifest import Manifest, settings_hash
+
+# Derived column operations: name -> function of (frame, **column arguments).
+DERIVED = {
+    'mid': lambda df, bid, ask: (df[bid] + df[ask]) / 2.0,
+    'spread': lambda df, bid, ask: df[ask] - df[bid],
+    'weighted_mid': lambda df, bid, ask, bid_volume, ask_volume:
+        (df[bid] * df[ask_volume].abs() + df[ask] * df[bid_volume]) / (df[bid_volume] + df[ask_volume].abs())
+}
+
+
+def datasets(input_path):
+    """Columnar datasets directly under <input_path>, or <input_path> itself if it is one"""
+    if os.path.exists(os.path.join(input_path, META_FILE)):
+        return [input_path]
+    return sorted(os.path.join(input_path, d) for d in os.listdir(input_path) if os.path.exists(os.path.join(input_path, d, META_FILE)))
+
+
+def cast(df, mapping):
+    """Rename and cast columns per a mapping file; columns it does not mention are kept as they are"""
+    for source, (target, dtype) in mapping.items():
+        if source not in df:
+            continue
+        if dtype is not None:
+            df[source] = df[source].astype(str if dtype in TEXT_TYPES else dtype)
+        if target != source:
+            df = df.rename(columns={source: target})
+    return df
+
+
+def derive(df, specs):
+    """Add every {"name", "op", **columns} in <specs> as a new column"""
+    for spec in specs:
+        spec = dict(spec)
+        name, op = spec.pop('name'), spec.pop('op')
+        df[name] = DERIVED[op](df, **spec)
+    return df
+
+
+def resample(df, on, every, how='last'):
+    """
+    One row per <every> units of column <on>, aggregated by <how> ('first', 'last', 'mean', 'max', 'min', 'sum').
+    Only numeric columns are kept unless <how> is 'first' or 'last'.
+    """
+    bucket = df[on] // every * every
+    values = df.drop(columns=[on])
+    if how not in ('first', 'last'):
+        values = values.select_dtypes('number')
+    return values.groupby(bucket.rename(on), sort=True).agg(how).reset_index()
+
+
+def partition_path(output_path, keys, values):
+    """Hive-style directory of one partition, e.g. product=KELP/day=-1"""
+    return os.path.join(output_path, *(f'{k}={v}' for k, v in zip(keys, values)))
+
+
+def _transform(task):
+    """Worker: transform the rows of one partition and publish them atomically"""
+    dataset, rows, output, conf, mapping = task
+    df = read_frame(dataset, rows=rows)
+    rows_in = len(df)
+
+    df = cast(df, mapping)
+    df = derive(df, conf.get('derive', []))
+    if conf.get('resample'):
+        df = resample(df, **conf['resample'])
+
+    with ColumnWriter(output, source=os.path.basename(dataset)) as writer:
+        writer.write(df)
+    return rows_in, len(df)
+
+
+def plan(input_path, output_path, conf, mapping):
+    """One task per partition of every input dataset; partition columns use their extracted names"""
+    keys = conf.get('partition_by', [])
+    tasks = []
+    for dataset in datasets(input_path):
+        df = read_frame(dataset, keys)
+        if keys:
+            groups = df.groupby(keys, sort=True).indices
+        else:
+            groups = {(): np.arange(read_meta(dataset)['rows'])}
+        for values, rows in groups.items():
+            values = values if isinstance(values, tuple) else (values,)
+            output = os.path.join(partition_path(output_path, keys, values), os.path.basename(dataset))
+            tasks.append((dataset, rows, output, conf, mapping))
+    return tasks
+
+
+def run(args, conf):
+    """
+    Transformation stage: split extracted datasets into partitions and transform them in a process pool.
+    :param args: Parsed command line arguments (input_path of extracted datasets, output_path, mapping_path of casts).
+    :param conf: 'transformation' section of the process config.
+    :return: Summary with partitions, datasets skipped, rows in and out, seconds and rows per second.
+    Unless 'incremental' is false in <conf>, datasets whose meta.json, config and casts are unchanged
+    since they were last fully transformed are skipped; a dataset counts as done once all its partitions are.
+    """
+    mapping = load_mapping(args['mapping_path'])
+    if not datasets(args['input_path']):
+        raise FileNotFoundError(f"No extracted datasets at {args['input_path']}")
+
+    manifest = Manifest(args['output_path'], 'transformation')
+    settings = settings_hash(conf=conf, mapping=mapping)
+    fingerprints, skipped = dict(), 0
+    for dataset in datasets(args['input_path']):
+        meta_file = os.path.join(dataset, META_FILE)
+        fingerprints[dataset] = manifest.fingerprint(meta_file)
+        if conf.get('incremental', True) and manifest.unchanged(meta_file, fingerprints[dataset], settings):
+            logging.info(f'Skipped unchanged {dataset}')
+            del fingerprints[dataset]
+            skipped += 1
+
+    tasks = [t for dataset in fingerprints for t in plan(dataset, args['output_path'], conf, mapping)]
+    pending = {d: [t[2] for t in tasks if t[0] == d] for d in fingerprints}
+    outputs = {d: list(o) for d, o in pending.items()}
+
+    def done(task):
+        dataset = task[0]
+        pending[dataset].remove(task[2])
+        if not pending[dataset]:
+            manifest.record(os.path.join(dataset, META_FILE), fingerprints[dataset], settings, outputs[dataset])
+            manifest.save()
+
+    processes = min(conf.get('processes') or os.cpu_count(), max(len(tasks), 1))
+    start, counts = time.perf_counter(), []
+    if processes == 1:
+        for t in tasks:
+            counts.append(_transform(t))
+            done(t)
+    elif tasks:
+        ctx = mp.get_context('fork') if 'fork' in mp.get_all_start_methods() else mp.get_context()
+        with ctx.Pool(processes) as pool:
+            for t, c in zip(tasks, pool.imap(_transform, tasks, chunksize=1)):
+                counts.append(c)
+                done(t)
+    manifest.save()
+    elapsed = time.perf_counter() - start
+
+    rows_in, rows_out = (sum(c) for c in zip(*counts)) if counts else (0, 0)
+    summary = {'partitions': len(tasks), 'skipped': skipped, 'rows_in': rows_in, 'rows_out': rows_out, 'seconds': elapsed,
+               'rows_per_sec': rows_in / elapsed if elapsed else 0.0, 'processes': processes}
+    logging.info(f"Transformation done: {len(tasks)} partitions, {skipped} datasets skipped, {rows_in} rows in, {rows_out} rows out, "
+                 f"{summary['rows_per_sec']:.0f} rows/sec on {summary['processes']} processes")
+    return summary
@@ -0,0 +1,165 @@
+import numpy as np
+import pandas as pd
+
+
+# Per-product series recorded at every tick.
+SERIES = ('position', 'cash', 'mid_price', 'pnl', 'realized', 'unrealized', 'drawdown', 'turnover')
+
+
+class Accounts:
+    """
+    Running position, cash and PnL per product, updated in O(1) per fill.
+    PnL is split into realized and unrealized against an average cost basis;
+    every tick the state is copied into preallocated per-product history arrays.
+    """
+
+    def __init__(self, products=(), capacity=16384):
+        self.products = []
+        self.index = dict()
+        self._capacity = capacity
+        self._size = 0
+
+        # Running state, one slot per product.
+        self._position = []
+        self._cash = []
+        self._avg_cost = []
+        self._realized = []
+        self._turnover = []
+        self._mid = []
+        self._peak = []
+        self._buys = []
+        self._sells = []
+        self._total_peak = 0.0
+
+        self._history = {k: np.zeros((0, capacity)) for k in SERIES}
+        self.timestamp = np.zeros(capacity, dtype=np.int64)
+        self.day = np.zeros(capacity, dtype=np.int64)
+        self.total_pnl = np.zeros(capacity)
+        self.total_drawdown = np.zeros(capacity)
+
+        for product in products:
+            self.add_product(product)
+
+    def __len__(self):
+        return self._size
+
+    def add_product(self, product):
+        if product in self.index:
+            return self.index[product]
+        self.index[product] = len(self.products)
+        self.products.append(product)
+        for state in (self._position, self._cash, self._avg_cost, self._realized, self._turnover, self._buys, self._sells):
+            state.append(0)
+        self._mid.append(np.nan)
+        self._peak.append(0.0)
+        for k, v in self._history.items():
+            self._history[k] = np.vstack([v, np.zeros((1, self._capacity))])
+        return self.index[product]
+
+    def position(self, product):
+        i = self.index.get(product)
+        return self._position[i] if i is not None else 0
+
+    def positions(self):
+        return dict(zip(self.products, self._position))
+
+    def set_mid(self, product, price):
+        self._mid[self.add_product(product)] = price
+
+    def fill(self, product, price, quantity):
+        """Book a fill of signed <quantity> at <price>"""
+        i = self.add_product(product)
+        position, avg_cost = self._position[i], self._avg_cost[i]
+        new_position = position + quantity
+
+        if position == 0 or (position > 0) == (quantity > 0):
+            avg_cost = (avg_cost * abs(position) + price * abs(quantity)) / abs(new_position)
+        else:
+            closed = min(abs(quantity), abs(position))
+            self._realized[i] += closed * (price - avg_cost) * (1 if position > 0 else -1)
+            if new_position == 0:
+                avg_cost = 0
+            elif (new_position > 0) != (position > 0):
+                avg_cost = price
+
+        self._position[i] = new_position
+        self._avg_cost[i] = avg_cost
+        self._cash[i] -= price * quantity
+        self._turnover[i] += abs(price * quantity)
+        if quantity > 0:
+            self._buys[i] += 1
+        else:
+            self._sells[i] += 1
+
+    def _grow(self):
+        self._capacity *= 2
+        for k, v in self._history.items():
+            new = np.zeros((v.shape[0], self._capacity))
+            new[:, :self._size] = v[:, :self._size]
+            self._history[k] = new
+        for k in ('timestamp', 'day', 'total_pnl', 'total_drawdown'):
+            v = getattr(self, k)
+            new = np.zeros(self._capacity, dtype=v.dtype)
+            new[:self._size] = v[:self._size]
+            setattr(self, k, new)
+
+    def mark(self, timestamp, day=0):
+        """Close the tick: mark positions to the latest mid price and record every series"""
+        if self._size == self._capacity:
+            self._grow()
+        t = self._size
+        h = self._history
+
+        total = 0.0
+        for i in range(len(self.products)):
+            position, mid = self._position[i], self._mid[i]
+            pnl = self._cash[i] + mid * position
+            self._peak[i] = max(self._peak[i], pnl)
+            total += pnl
+
+            h['position'][i, t] = position
+            h['cash'][i, t] = self._cash[i]
+            h['mid_price'][i, t] = mid
+            h['pnl'][i, t] = pnl
+            h['realized'][i, t] = self._realized[i]
+            h['unrealized'][i, t] = (mid - self._avg_cost[i]) * position
+            h['drawdown'][i, t] = self._peak[i] - pnl
+            h['turnover'][i, t] = self._turnover[i]
+
+        self._total_peak = max(self._total_peak, total)
+        self.timestamp[t] = timestamp
+        self.day[t] = day
+        self.total_pnl[t] = total
+        self.total_drawdown[t] = self._total_peak - total
+        self._size += 1
+
+    def series(self, name):
+        """Product -> recorded array of one of SERIES"""
+        v = self._history[name]
+        return {p: v[i, :self._size] for i, p in enumerate(self.products)}
+
+    def stats(self):
+        """Final figures per product and in total, read from running state"""
+        t = self._size - 1
+        h = self._history
+        rows = []
+        for i, p in enumerate(self.products):
+            rows.append({'product': p,
+                         'pnl': h['pnl'][i, t],
+                         'realized': h['realized'][i, t],
+                         'unrealized': h['unrealized'][i, t],
+                         'max_drawdown': h['drawdown'][i, :t + 1].max(),
+                         'max_position': np.abs(h['position'][i, :t + 1]).max(),
+                         'turnover': self._turnover[i],
+                         'buys': self._buys[i],
+                         'sells': self._sells[i]})
+        rows.append({'product': 'total',
+                     'pnl': self.total_pnl[t],
+                     'realized': sum(r['realized'] for r in rows),
+                     'unrealized': sum(r['unrealized'] for r in rows),
+                     'max_drawdown': self.total_drawdown[:t + 1].max(),
+                     'max_position': np.nan,
+                     'turnover': sum(self._turnover),
+                     'buys': sum(self._buys),
+                     'sells': sum(self._sells)})
+        return pd.DataFrame(rows).set_index('product')
@@ -0,0 +1,254 @@
+import argparse
+import glob
+import importlib
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import time
+import numpy as np
+import pandas as pd
+import datamodel
+from marketdata import MarketData, TradeData
+from simulator import Simulator
+
+
+# Median throughput drop, relative to the baseline, that counts as a regression.
+# Back-to-back runs of unchanged code differ by up to 1.3x here, so anything tighter flags noise.
+REGRESSION_THRESHOLD = 0.30
+
+# Same for the import[...] rows: a subprocess cold start varies much more than an in-process sample.
+IMPORT_REGRESSION_THRESHOLD = 0.50
+
+# Shortest timed sample, in seconds; faster benchmarks are looped until one sample takes this long.
+MIN_SAMPLE_TIME = 0.2
+
+# Modules headless workers import; none of them may pull in a plotting package at import time.
+HEADLESS_MODULES = ('simulator', 'sweep', 'harness', 'profiler')
+PLOTTING_PACKAGES = ('matplotlib', 'plotly', 'IPython')
+
+DATA_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class _Enough(Exception):
+    pass
+
+
+class _Recorder:
+    """Trader stand-in that keeps a copy of the first <limit> trading states, then stops the run"""
+
+    def __init__(self, trader, limit):
+        self.trader = trader
+        self.limit = limit
+        self.states = []
+
+    def run(self, state):
+        if len(self.states) == self.limit:
+            raise _Enough
+        self.states.append(datamodel.TradingState(state.traderData, state.timestamp, dict(state.listings), dict(state.order_depths),
+                                                  dict(state.own_trades), dict(state.market_trades), dict(state.position), dict(state.observations)))
+        return self.trader.run(state)
+
+
+def shipped_days():
+    """(prices csv, trades csv) of every day shipped next to this module"""
+    days = []
+    files = glob.glob(os.path.join(DATA_DIR, 'prices_round_*_day_*.csv'))
+    for prices_file in sorted(files, key=lambda f: int(os.path.splitext(f)[0].rpartition('_day_')[2])):
+        trades_file = prices_file.replace('prices_', 'trades_')
+        days.append((prices_file, trades_file if os.path.exists(trades_file) else None))
+    return days
+
+
+def _loop(fn, number):
+    start = time.perf_counter()
+    for _ in range(number):
+        fn()
+    return time.perf_counter() - start
+
+
+def _time(fn, repeat):
+    """Seconds per call of <fn> in each of <repeat> samples of at least MIN_SAMPLE_TIME"""
+    number, elapsed = 1, _loop(fn, 1)
+    while elapsed < MIN_SAMPLE_TIME:
+        number = max(2 * number, int(number * 1.2 * MIN_SAMPLE_TIME / max(elapsed, 1e-9)))
+        elapsed = _loop(fn, number)
+
+    # A single call that already fills a sample is kept as the first sample; looped calls are timed afresh after warming up.
+    times = [elapsed / number] if number == 1 else []
+    while len(times) < repeat:
+        times.append(_loop(fn, number) / number)
+    return times
+
+
+def _record(name, times, units, unit):
+    best, median = min(times), float(np.median(times))
+    return {'name': name, 'unit': unit, 'units': units, 'best_s': best, 'median_s': median,
+            'throughput': units / best, 'throughput_median': units / median, 'repeat': len(times)}
+
+
+def bench_simulate(trader_cls, days, repeat=5):
+    """End-to-end Simulator.simulate throughput in ticks/s per day, excluding data loading"""
+    rows = []
+    for prices_file, trades_file in days:
+        sim = Simulator(data=MarketData.from_csv(prices_file), trades=TradeData.from_csv(trades_file) if trades_file else None)
+        times = _time(lambda: sim.simulate(trader_cls()), repeat)
+        rows.append(_record(f'simulate[{os.path.basename(prices_file)}]', times, len(sim.timestamp), 'ticks/s'))
+    return rows
+
+
+def bench_import(modules=HEADLESS_MODULES, repeat=10):
+    """Cold import time of each module in a fresh interpreter, with the plotting packages the import loaded"""
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, [DATA_DIR, os.environ.get('PYTHONPATH')]))}
+    rows = []
+    for module in modules:
+        code = (f'import sys, time; t = time.perf_counter(); import {module}; '
+                f'print(time.perf_counter() - t, *(p for p in {PLOTTING_PACKAGES!r} if p in sys.modules))')
+        times, plotting = [], []
+        for _ in range(repeat):
+            out = subprocess.run([sys.executable, '-c', code], cwd=DATA_DIR, env=env, capture_output=True, text=True, check=True).stdout.split()
+            times.append(float(out[0]))
+            plotting = out[1:]
+        rows.append({**_record(f'import[{module}]', times, 1, 'imports/s'), 'plotting': plotting})
+    return rows
+
+
+def sample_states(trader_cls, prices_file, trades_file=None, ticks=1000):
+    """Trading states of the first <ticks> ticks of a day, as the Simulator hands them to the Trader"""
+    sim = Simulator(data=MarketData.from_csv(prices_file), trades=TradeData.from_csv(trades_file) if trades_file else None)
+    recorder = _Recorder(trader_cls(), ticks)
+    try:
+        sim.simulate(recorder)
+    except _Enough:
+        pass
+    return recorder.states
+
+
+def bench_components(trader_cls, states, repeat=5):
+    """Per-call throughput of the shared STRATEGY helpers and of every product strategy's act()"""
+    module = sys.modules[trader_cls.__module__]
+    base = getattr(module, 'STRATEGY')
+    rows = []
+
+    books = [(p, od) for st in states for p, od in st.order_depths.items()]
+
+    def hit_the_book():
+        for product, od in books:
+            base.hit_the_book(product, od, 50, 10000, 50, 10000)
+    rows.append(_record('STRATEGY.hit_the_book', _time(hit_the_book, repeat), len(books), 'calls/s'))
+
+    def calculate_barrier_price():
+        for _, od in books:
+            base.calculate_barrier_price(od.buy_orders, threshold=15)
+            base.calculate_barrier_price(od.sell_orders, threshold=15)
+    rows.append(_record('STRATEGY.calculate_barrier_price', _time(calculate_barrier_price, repeat), 2 * len(books), 'calls/s'))
+
+    for product, strategy_cls in trader_cls.STRATEGY.items():
+        product_states = [st for st in states if product in st.order_depths]
+        if not product_states:
+            continue
+
+        def act():
+            memo = trader_cls.CODEC.defaults() if hasattr(trader_cls, 'CODEC') else dict()
+            for st in product_states:
+                strategy_cls().act(st, memo)
+        rows.append(_record(f'{strategy_cls.__name__}.act', _time(act, repeat), len(product_states), 'calls/s'))
+
+    return rows
+
+
+def run(trader_cls, days=None, repeat=5, ticks=1000):
+    """
+    Run the whole suite.
+    :param trader_cls: Trader class whose module defines STRATEGY and the product strategies.
+    :param days: List of (prices csv, trades csv or None); defaults to the shipped days.
+    :param repeat: Timed repetitions per benchmark, doubled for the cold imports; the median one is compared against a baseline.
+    :param ticks: Ticks of the first day sampled for the component benchmarks.
+    :return: JSON-serialisable dict of environment and results.
+    """
+    days = days if days is not None else shipped_days()
+    rows = bench_import(repeat=2 * repeat)
+    rows += bench_simulate(trader_cls, days, repeat)
+    rows += bench_components(trader_cls, sample_states(trader_cls, *days[0], ticks=ticks), max(repeat, 5))
+    return {'meta': {'trader': f'{trader_cls.__module__}.{trader_cls.__name__}',
+                     'days': [os.path.basename(p) for p, _ in days],
+                     'python': platform.python_version(),
+                     'numpy': np.__version__,
+                     'pandas': pd.__version__,
+                     'machine': platform.platform(),
+                     'time': time.strftime('%Y-%m-%dT%H:%M:%S')},
+            'results': {r['name']: r for r in rows}}
+
+
+def compare(current, baseline, threshold=REGRESSION_THRESHOLD, import_threshold=IMPORT_REGRESSION_THRESHOLD):
+    """
+    Median throughput of <current> against <baseline> per benchmark.
+    A benchmark regressed if it fell by more than <threshold>, or <import_threshold> for the import[...] rows.
+    Baselines written before medians were recorded are compared on their best throughput.
+    """
+    rows = []
+    for name, r in current['results'].items():
+        b = baseline['results'].get(name)
+        key = 'throughput_median' if b is not None and 'throughput_median' in b else 'throughput'
+        ratio = r[key] / b[key] if b is not None else np.nan
+        allowed = import_threshold if name.startswith('import[') else threshold
+        rows.append({'name': name, 'unit': r['unit'],
+                     'baseline': b[key] if b is not None else np.nan,
+                     'current': r[key],
+                     'ratio': ratio,
+                     'allowed': 1 - allowed,
+                     'regression': bool(ratio < 1 - allowed)})
+    return pd.DataFrame(rows).set_index('name')
+
+
+def main(argv):
+    arg_parser = argparse.ArgumentParser('Benchmark suite')
+    arg_parser.add_argument('trader', nargs='?', default='round1_11.Trader', help='Trader class as module.Class')
+    arg_parser.add_argument('days', nargs='*', help='Prices csv files, defaults to the shipped days')
+    arg_parser.add_argument('-t', dest='trades', nargs='+', default=None, help='Trades csv files, one per prices file')
+    arg_parser.add_argument('-r', dest='repeat', type=int, default=5, help='Repetitions per benchmark')
+    arg_parser.add_argument('-n', dest='ticks', type=int, default=1000, help='Ticks sampled for component benchmarks')
+    arg_parser.add_argument('-o', dest='output', default=None, help='Write results to this json file')
+    arg_parser.add_argument('-b', dest='baseline', default=None, help='Compare against this json file')
+    arg_parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD, help='Allowed relative drop of median throughput')
+    arg_parser.add_argument('--import-threshold', type=float, default=IMPORT_REGRESSION_THRESHOLD, help='Same for the cold import benchmarks')
+    args = arg_parser.parse_args(argv)
+
+    logging.basicConfig(format='%(message)s', level=logging.INFO)
+
+    module_name, _, cls_name = args.trader.rpartition('.')
+    trader_cls = getattr(importlib.import_module(module_name), cls_name)
+
+    days = None
+    if args.days:
+        days = list(zip(args.days, args.trades)) if args.trades is not None else [(d, None) for d in args.days]
+
+    current = run(trader_cls, days, args.repeat, args.ticks)
+    if args.output is not None:
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+
+    table = pd.DataFrame(current['results'].values()).set_index('name')[['throughput_median', 'unit', 'best_s', 'median_s']]
+    logging.info(table.to_string())
+
+    status = 0
+    plotting = {name: r['plotting'] for name, r in current['results'].items() if r.get('plotting')}
+    if plotting:
+        logging.error(f'-> Plotting packages loaded at import time: {plotting}')
+        status = 1
+
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        diff = compare(current, baseline, args.threshold, args.import_threshold)
+        logging.info('\n' + diff.to_string())
+        if diff['regression'].any():
+            logging.error(f"-> Regression beyond the allowed ratio in {list(diff.index[diff['regression']])}")
+            status = 1
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
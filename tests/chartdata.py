@@ -0,0 +1,111 @@
+import numpy as np
+import pandas as pd
+from marketdata import LEVELS
+
+
+CHART_COLUMNS = {
+    'idx': np.float64,
+    'Price': np.float64,
+    'Quantity': np.float64,
+    'Type 1': object,
+    'Type 2': object
+}
+
+
+class TickIndex:
+    """Rows of a frame sorted by tick index <key> // <scale>, sliced by binary search"""
+
+    def __init__(self, df, key='timestamp', scale=100):
+        self.df = df.sort_values(key, kind='stable').reset_index(drop=True)
+        self.ticks = self.df[key].to_numpy() // scale
+
+    def __len__(self):
+        return len(self.df)
+
+    def window(self, start_timestamp, end_timestamp):
+        """Rows whose tick index lies in [start_timestamp, end_timestamp]"""
+        lo = np.searchsorted(self.ticks, start_timestamp, side='left')
+        hi = np.searchsorted(self.ticks, end_timestamp, side='right')
+        return self.df.iloc[lo:hi]
+
+
+def by_product(df, column='product'):
+    """Product -> TickIndex over that product's rows"""
+    return {p: TickIndex(g) for p, g in df.groupby(column, sort=False)}
+
+
+def histogram(trades):
+    """Total quantity per tick and price of <trades> as a TickIndex over idx, Price and Quantity"""
+    hist = (trades.assign(idx=trades['timestamp'] // 100)
+                  .groupby(['idx', 'price'])['quantity'].sum()
+                  .reset_index()
+                  .rename(columns={'price': 'Price', 'quantity': 'Quantity'}))
+    return TickIndex(hist, key='idx', scale=1)
+
+
+def position(buys, sells, n):
+    """Own position after each of <n> ticks, preceded by 0, from buy and sell histograms"""
+    net = np.zeros(n)
+    for hist, sign in ((buys, 1), (sells, -1)):
+        keep = hist.ticks < n
+        np.add.at(net, hist.ticks[keep].astype(np.int64), sign * hist.df['Quantity'].to_numpy()[keep])
+    return np.concatenate([[0], np.cumsum(net)])
+
+
+def _levels(df):
+    """Prices and volumes of all bid then ask levels as (rows, 2 * len(LEVELS)) arrays, with empty levels masked"""
+    prices = df[[f'{side}_price_{i}' for side in ('bid', 'ask') for i in LEVELS]].to_numpy(dtype=np.float64)
+    volumes = df[[f'{side}_volume_{i}' for side in ('bid', 'ask') for i in LEVELS]].to_numpy(dtype=np.float64)
+    mask = (volumes != 0) & ~np.isnan(volumes)
+    return prices, volumes, mask
+
+
+def book_points(df):
+    """
+    Long-form order book of a price frame: one row per non-empty level, bids before asks within a tick.
+    :param df: Price rows of one product, e.g. from TickIndex.window().
+    :return: DataFrame with CHART_COLUMNS.
+    """
+    prices, volumes, mask = _levels(df)
+    n = len(LEVELS)
+
+    idx = np.repeat(df['timestamp'].to_numpy() // 100, 2 * n).reshape(prices.shape)
+    side = np.array(['Bid Book'] * n + ['Ask Book'] * n, dtype=object)
+    side = np.broadcast_to(side, prices.shape)
+
+    return pd.DataFrame({'idx': idx[mask].astype(np.float64),
+                         'Price': prices[mask],
+                         'Quantity': volumes[mask],
+                         'Type 1': side[mask],
+                         'Type 2': '1'}, columns=list(CHART_COLUMNS))
+
+
+def wavg_mid_price(df):
+    """Volume weighted average price over every visible level, for all rows at once"""
+    prices, volumes, mask = _levels(df)
+    volumes = np.where(mask, np.abs(volumes), 0)
+    prices = np.where(mask, prices, 0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (prices * volumes).sum(axis=1) / volumes.sum(axis=1)
+
+
+def trade_points(hist, start_timestamp, end_timestamp, label):
+    """
+    Long-form trades from a histogram(), limited to [start_timestamp, end_timestamp].
+    :param label: Value of 'Type 1' for these points.
+    :return: DataFrame with CHART_COLUMNS.
+    """
+    rows = hist.window(start_timestamp, end_timestamp)
+    return pd.DataFrame({'idx': rows['idx'].to_numpy(dtype=np.float64),
+                         'Price': rows['Price'].to_numpy(dtype=np.float64),
+                         'Quantity': rows['Quantity'].to_numpy(dtype=np.float64),
+                         'Type 1': label,
+                         'Type 2': '2'}, columns=list(CHART_COLUMNS))
+
+
+def concat(frames):
+    """Stack chart frames, keeping CHART_COLUMNS dtypes when every frame is empty"""
+    frames = [f for f in frames if len(f)]
+    if not frames:
+        return pd.DataFrame({k: np.empty(0, dtype=v) for k, v in CHART_COLUMNS.items()})
+    return pd.concat(frames, ignore_index=True)
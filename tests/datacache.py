@@ -0,0 +1,122 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+
+
+CACHE_VERSION = 1
+CACHE_DIR = '.datacache'
+
+
+def _hash(path, block=1 << 20):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(block), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _cache_path(csv_file, cache_dir):
+    if cache_dir is None:
+        cache_dir = os.path.join(os.path.dirname(os.path.abspath(csv_file)), CACHE_DIR)
+    return os.path.join(cache_dir, os.path.basename(csv_file))
+
+
+def _write(df, path, source_hash, sep):
+    """
+    Write <df> as one raw binary file per column plus meta.json, then move it into place.
+    :return: False if the cache directory could not be written, e.g. read-only data.
+    """
+    tmp = None
+    try:
+        parent = os.path.dirname(path)
+        os.makedirs(parent, exist_ok=True)
+        tmp = tempfile.mkdtemp(dir=parent)
+        _write_columns(df, tmp, source_hash, sep)
+    except OSError as e:
+        logging.warning(f'-> Could not write data cache {path}: {e}')
+        if tmp is not None:
+            shutil.rmtree(tmp, ignore_errors=True)
+        return False
+
+    # An old cache is renamed aside and removed only once the new one is in place, so <path> is never missing.
+    # Another process may have built the same cache meanwhile; either copy is valid.
+    aside = tempfile.mkdtemp(dir=parent)
+    try:
+        os.replace(path, os.path.join(aside, 'old'))
+    except OSError:
+        pass
+    try:
+        os.replace(tmp, path)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)
+        if not os.path.exists(path) and os.path.exists(os.path.join(aside, 'old')):
+            os.replace(os.path.join(aside, 'old'), path)
+    shutil.rmtree(aside, ignore_errors=True)
+    return True
+
+
+def _write_columns(df, tmp, source_hash, sep):
+    columns = []
+    for n, (name, col) in enumerate(df.items()):
+        categories = None
+        if col.dtype.kind in 'biuf':
+            values = col.to_numpy()
+        else:
+            codes, uniques = pd.factorize(col)
+            values, categories = codes.astype(np.int32), [str(u) for u in uniques]
+        values.tofile(os.path.join(tmp, f'{n}.bin'))
+        columns.append({'name': name, 'dtype': values.dtype.str, 'categories': categories})
+
+    meta = {'version': CACHE_VERSION, 'source_hash': source_hash, 'sep': sep, 'rows': len(df), 'columns': columns}
+    with open(os.path.join(tmp, 'meta.json'), 'w') as f:
+        json.dump(meta, f)
+
+
+def _read(path, source_hash, sep):
+    """Memory-map a cache directory; None if it is missing, stale or from another version"""
+    try:
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if meta.get('version') != CACHE_VERSION or meta.get('source_hash') != source_hash or meta.get('sep') != sep:
+        return None
+
+    rows, cols = meta['rows'], dict()
+    for n, c in enumerate(meta['columns']):
+        dtype = np.dtype(c['dtype'])
+        values = np.asarray(np.memmap(os.path.join(path, f'{n}.bin'), dtype=dtype, mode='r', shape=(rows,))) if rows else np.empty(0, dtype)
+        if c['categories'] is not None:
+            lookup = np.array(c['categories'] + [np.nan], dtype=object)
+            values = lookup[values]
+        cols[c['name']] = values
+    return cols
+
+
+def load_columns(csv_file, sep=';', cache_dir=None):
+    """
+    Columns of a delimited file as arrays, served from a versioned binary cache.
+    Numeric columns are memory-mapped; text columns are stored as codes and decoded on load.
+    The cache is keyed by a content hash of <csv_file> and rebuilt whenever it changes;
+    if it cannot be written, the parsed columns are returned from memory instead.
+    """
+    source_hash = _hash(csv_file)
+    path = _cache_path(csv_file, cache_dir)
+
+    cols = _read(path, source_hash, sep)
+    if cols is None:
+        df = pd.read_csv(csv_file, sep=sep)
+        cols = _read(path, source_hash, sep) if _write(df, path, source_hash, sep) else None
+        if cols is None:
+            cols = {k: v.to_numpy() for k, v in df.items()}
+    return cols
+
+
+def read_frame(csv_file, sep=';', cache_dir=None):
+    """Drop-in for pd.read_csv(csv_file, sep=sep) backed by the binary cache"""
+    return pd.DataFrame(load_columns(csv_file, sep=sep, cache_dir=cache_dir), copy=False)
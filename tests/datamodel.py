@@ -1,5 +1,6 @@
 import json
-from typing import Dict, List
+from typing import Dict, List, Tuple
+from itertools import accumulate
 from json import JSONEncoder
 import jsonpickle
 
@@ -62,6 +63,124 @@ class OrderDepth:
         self.sell_orders: Dict[int, int] = {}
 
 
+class BookSide(dict):
+    """
+    Price -> volume dict that also serves its levels sorted best first (highest price first if <reverse>),
+    with cumulative volumes and volume-weighted price. These are derived lazily and recomputed after any change,
+    so a Trader editing the book sees the same answers as with a plain dict.
+    """
+
+    __slots__ = ('reverse', '_levels', '_cum_volume', '_vwap')
+
+    def __init__(self, levels=(), reverse=False):
+        super().__init__(levels)
+        self.reverse = reverse
+        self._changed()
+
+    def __getstate__(self):
+        # Orders travel as pairs so that int prices survive jsonpickle, which otherwise drops dict subclass items.
+        return {'reverse': self.reverse, 'orders': list(self.items())}
+
+    def __setstate__(self, state):
+        dict.update(self, state['orders'])
+        self.reverse = state['reverse']
+        self._changed()
+
+    def _changed(self):
+        self._levels = self._cum_volume = self._vwap = None
+
+    @property
+    def levels(self) -> List[Tuple[int, int]]:
+        if self._levels is None:
+            self._levels = sorted(self.items(), reverse=self.reverse)
+        return self._levels
+
+    @property
+    def cum_volume(self) -> List[int]:
+        if self._cum_volume is None:
+            self._cum_volume = list(accumulate(abs(v) for _, v in self.levels))
+        return self._cum_volume
+
+    @property
+    def vwap(self):
+        if self._vwap is None and self:
+            volume = sum(v for _, v in self.levels)
+            self._vwap = sum(p * v for p, v in self.levels) / volume if volume else None
+        return self._vwap
+
+    def __setitem__(self, price, volume):
+        super().__setitem__(price, volume)
+        self._changed()
+
+    def __delitem__(self, price):
+        super().__delitem__(price)
+        self._changed()
+
+    def __ior__(self, other):
+        super().__ior__(other)
+        self._changed()
+        return self
+
+    def pop(self, *args):
+        value = super().pop(*args)
+        self._changed()
+        return value
+
+    def popitem(self):
+        item = super().popitem()
+        self._changed()
+        return item
+
+    def setdefault(self, price, volume=None):
+        value = super().setdefault(price, volume)
+        self._changed()
+        return value
+
+    def update(self, *args, **kwargs):
+        super().update(*args, **kwargs)
+        self._changed()
+
+    def clear(self):
+        super().clear()
+        self._changed()
+
+
+class BookDepth(OrderDepth):
+    """OrderDepth with sorted sides, best prices and volume-weighted mid, derived from its current orders"""
+
+    def __init__(self, bids=(), asks=()):
+        self.buy_orders = BookSide(bids, reverse=True)
+        self.sell_orders = BookSide(asks)
+
+    @staticmethod
+    def _side(orders, reverse):
+        # A Trader may replace a side with a plain dict.
+        return orders if isinstance(orders, BookSide) else BookSide(orders, reverse)
+
+    @property
+    def best_bid(self):
+        levels = self._side(self.buy_orders, True).levels
+        return levels[0][0] if levels else None
+
+    @property
+    def best_ask(self):
+        levels = self._side(self.sell_orders, False).levels
+        return levels[0][0] if levels else None
+
+    @property
+    def vwap_bid(self):
+        return self._side(self.buy_orders, True).vwap
+
+    @property
+    def vwap_ask(self):
+        return self._side(self.sell_orders, False).vwap
+
+    @property
+    def vwap_mid(self):
+        bid, ask = self.vwap_bid, self.vwap_ask
+        return (bid + ask) / 2.0 if bid is not None and ask is not None else None
+
+
 class Trade:
 
     def __init__(self, symbol: Symbol, price: int, quantity: int, buyer: UserId=None, seller: UserId=None, timestamp: int=0) -> None:
@@ -100,10 +219,36 @@ class TradingState(object):
         self.observations = observations
         
     def toJSON(self):
-        return json.dumps(self, default=lambda o: o.__dict__, sort_keys=True)
+        return json.dumps(self, default=_fields, sort_keys=True)
+
+
+def _fields(o):
+    """Attributes of <o> for JSON, whether kept in __dict__ or __slots__"""
+    fields = {k: getattr(o, k) for c in reversed(type(o).__mro__) for k in vars(c).get('__slots__', ()) if hasattr(o, k)}
+    fields.update(getattr(o, '__dict__', {}))
+    return fields
+
+
+def compact(cls, *fields):
+    """
+    Subclass of <cls> that stores <fields> in __slots__, so instances built by the simulator skip the
+    per-instance __dict__ unless a Trader adds attributes of its own; isinstance checks against <cls> still hold.
+    """
+    return type('Compact' + cls.__name__, (cls,), {'__slots__': fields, '__doc__': cls.__doc__,
+                                                   '__getstate__': _fields, '__setstate__': _set_fields})
+
+
+def _set_fields(o, state):
+    for k, v in state.items():
+        setattr(o, k, v)
+
+
+CompactListing = compact(Listing, 'symbol', 'product', 'denomination')
+CompactTrade = compact(Trade, 'symbol', 'price', 'quantity', 'buyer', 'seller', 'timestamp')
+CompactTradingState = compact(TradingState, 'traderData', 'timestamp', 'listings', 'order_depths', 'own_trades', 'market_trades', 'position', 'observations')
 
     
 class ProsperityEncoder(JSONEncoder):
 
         def default(self, o):
-            return o.__dict__
\ No newline at end of file
+            return _fields(o)
\ No newline at end of file
@@ -0,0 +1,97 @@
+class CrossFillModel:
+    """Fill orders only where they cross the visible book"""
+
+    uses_trades = False
+
+    def fill(self, order_depth, orders, trades=None):
+        """
+        Match one product's orders for a tick.
+        :param order_depth: Book the orders were sent against.
+        :param orders: List of datamodel.Order in submission order.
+        :param trades: Dict of price -> quantity printed by the market until the next tick.
+        :return: List of (price, signed quantity) fills and the unfilled signed quantity per order.
+        """
+        sorted_buy_orders = list(map(list, getattr(order_depth.buy_orders, 'levels', None) or sorted(order_depth.buy_orders.items(), reverse=True)))
+        sorted_sell_orders = list(map(list, getattr(order_depth.sell_orders, 'levels', None) or sorted(order_depth.sell_orders.items(), reverse=False)))
+
+        fills = []
+        remaining = []
+        for o in orders:
+            price, quantity = o.price, o.quantity
+
+            if quantity > 0:
+                for v in sorted_sell_orders:
+                    if price >= v[0] and abs(v[1]) > 0 and quantity > 0:
+                        done = min(quantity, abs(v[1]))
+                        quantity -= done
+                        fills.append((v[0], done))
+                        v[1] += done
+
+            elif quantity < 0:
+                for v in sorted_buy_orders:
+                    if price <= v[0] and v[1] > 0 and quantity < 0:
+                        done = min(abs(quantity), v[1])
+                        quantity += done
+                        fills.append((v[0], -done))
+                        v[1] -= done
+
+            remaining.append(quantity)
+
+        return fills, remaining
+
+
+class PassiveFillModel(CrossFillModel):
+    """
+    Cross the visible book first, then let what is left rest for one tick and
+    fill against market trades printed at or through its price.
+    <queue_position> is the share of the visible volume already resting at our
+    price that must trade before us: 0 is the front of the queue, 1 the back.
+    """
+
+    uses_trades = True
+
+    def __init__(self, queue_position=1.0):
+        self.queue_position = queue_position
+
+    def fill(self, order_depth, orders, trades=None):
+
+        fills, remaining = super().fill(order_depth, orders, trades)
+        if not trades:
+            return fills, remaining
+
+        # Trade volume per price level, consumed as resting orders fill.
+        available = dict(trades)
+        levels = sorted(available)
+
+        resting = [(o.price, q, i) for i, (o, q) in enumerate(zip(orders, remaining)) if q != 0]
+        # Most aggressive quotes fill first.
+        resting.sort(key=lambda x: -x[0] if x[1] > 0 else x[0])
+
+        for price, quantity, i in resting:
+            if quantity > 0:
+                through = [p for p in levels if p <= price]
+                queue = self.queue_position * order_depth.buy_orders.get(price, 0)
+            else:
+                through = [p for p in reversed(levels) if p >= price]
+                queue = self.queue_position * -order_depth.sell_orders.get(price, 0)
+
+            for p in through:
+                volume = available[p]
+                if p == price:
+                    volume = max(0, int(volume - queue))
+                done = min(abs(quantity), volume)
+                if done <= 0:
+                    continue
+                available[p] -= done
+                if quantity > 0:
+                    quantity -= done
+                    fills.append((price, done))
+                else:
+                    quantity += done
+                    fills.append((price, -done))
+                if quantity == 0:
+                    break
+
+            remaining[i] = quantity
+
+        return fills, remaining
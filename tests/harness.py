@@ -0,0 +1,136 @@
+import logging
+import multiprocessing as mp
+import time
+import traceback
+import numpy as np
+import pandas as pd
+
+
+# Seconds the exchange allows a single Trader.run call.
+RUN_TIME_LIMIT = 0.9
+
+
+def _serve(conn, trader_cls, args):
+    trader = trader_cls(*args)
+    while True:
+        state = conn.recv()
+        if state is None:
+            break
+        start = time.perf_counter()
+        try:
+            out = trader.run(state)
+        except Exception:
+            conn.send((False, traceback.format_exc(), time.perf_counter() - start))
+            continue
+        conn.send((True, out, time.perf_counter() - start))
+    conn.close()
+
+
+class IsolatedTrader:
+    """
+    Stand-in for a Trader that runs the real one in a worker process and times every run() call.
+    Calls slower than <budget> seconds are logged; if <timeout> is set, a call still running after
+    <timeout> seconds is killed, the tick is sent no orders, and a fresh worker takes over with the
+    traderData it was given. Pass it to Simulator.simulate() in place of a Trader instance.
+    """
+
+    logging.basicConfig(format='%(message)s', level=logging.INFO)
+
+    def __init__(self, trader_cls, budget=RUN_TIME_LIMIT, timeout=None, args=()):
+        self.trader_cls = trader_cls
+        self.budget = budget
+        self.timeout = timeout
+        self.args = args
+        self.timestamps = []
+        self.run_times = []
+        self.wall_times = []
+        self.killed = []
+        self._worker = self._conn = None
+        self._start()
+
+    def _start(self):
+        # Without fork, <trader_cls> and <args> are pickled, so the class must be importable by the worker.
+        ctx = mp.get_context('fork') if 'fork' in mp.get_all_start_methods() else mp.get_context()
+        self._conn, child = ctx.Pipe()
+        self._worker = ctx.Process(target=_serve, args=(child, self.trader_cls, self.args), daemon=True)
+        self._worker.start()
+        child.close()
+
+    def _kill(self):
+        self._worker.kill()
+        self._worker.join()
+        self._conn.close()
+
+    def close(self):
+        if self._worker is not None and self._worker.is_alive():
+            self._conn.send(None)
+            self._worker.join()
+            self._conn.close()
+        self._worker = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def clear(self):
+        """Forget recorded timings, e.g. between runs"""
+        self.timestamps.clear()
+        self.run_times.clear()
+        self.wall_times.clear()
+        self.killed.clear()
+
+    def run(self, state):
+        if self._worker is None:
+            self._start()
+
+        start = time.perf_counter()
+        self._conn.send(state)
+
+        if self.timeout is not None and not self._conn.poll(self.timeout):
+            elapsed = time.perf_counter() - start
+            logging.error(f"-> Trader.run killed at timestamp {state.timestamp} after {elapsed * 1000:.0f}ms")
+            self._kill()
+            self._start()
+            self.timestamps.append(state.timestamp)
+            self.run_times.append(elapsed)
+            self.wall_times.append(elapsed)
+            self.killed.append(state.timestamp)
+            return {}, 0, state.traderData
+
+        ok, out, run_time = self._conn.recv()
+        wall_time = time.perf_counter() - start
+        if not ok:
+            raise RuntimeError(f"Trader.run failed at timestamp {state.timestamp}:\n{out}")
+
+        self.timestamps.append(state.timestamp)
+        self.run_times.append(run_time)
+        self.wall_times.append(wall_time)
+        if run_time > self.budget:
+            logging.warning(f"-> Trader.run took {run_time * 1000:.1f}ms at timestamp {state.timestamp}, over the {self.budget * 1000:.0f}ms budget")
+        return out
+
+    def latency(self):
+        """Per-call run() and round-trip times in milliseconds, indexed by timestamp"""
+        return pd.DataFrame({'run': np.array(self.run_times) * 1000,
+                             'wall': np.array(self.wall_times) * 1000},
+                            index=pd.Index(self.timestamps, name='timestamp'))
+
+    def stats(self):
+        """Latency percentiles in milliseconds and counts of calls over budget or killed"""
+        run = np.array(self.run_times) * 1000
+        if not len(run):
+            return {'calls': 0, 'p50': np.nan, 'p99': np.nan, 'max': np.nan, 'over_budget': 0, 'killed': 0}
+        return {'calls': len(run),
+                'p50': np.percentile(run, 50),
+                'p99': np.percentile(run, 99),
+                'max': run.max(),
+                'over_budget': int((run > self.budget * 1000).sum()),
+                'killed': len(self.killed)}
+
+    def summary(self):
+        s = self.stats()
+        logging.info(f"# of Trader.run calls is {s['calls']:d}")
+        logging.info(f" -> p50 {s['p50']:.2f}ms, p99 {s['p99']:.2f}ms, max {s['max']:.2f}ms")
+        logging.info(f" -> {s['over_budget']:d} over the {self.budget * 1000:.0f}ms budget, {s['killed']:d} killed")
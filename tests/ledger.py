@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+
+class Ledger:
+    """Column-oriented append-only table with amortized growth"""
+
+    def __init__(self, columns, capacity=1024):
+        self.columns = dict(columns)
+        self._capacity = capacity
+        self._size = 0
+        self._data = {k: np.empty(capacity, dtype=v) for k, v in self.columns.items()}
+
+    def __len__(self):
+        return self._size
+
+    def _grow(self):
+        self._capacity *= 2
+        for k, v in self._data.items():
+            new = np.empty(self._capacity, dtype=v.dtype)
+            new[:self._size] = v[:self._size]
+            self._data[k] = new
+
+    def append(self, *row):
+        if self._size == self._capacity:
+            self._grow()
+        n = self._size
+        for v, x in zip(self._data.values(), row):
+            v[n] = x
+        self._size += 1
+
+    def extend(self, **cols):
+        """Append whole columns at once; every column must have the same length"""
+        n = len(next(iter(cols.values())))
+        while self._size + n > self._capacity:
+            self._grow()
+        for k, v in self._data.items():
+            v[self._size:self._size + n] = cols[k]
+        self._size += n
+
+    def column(self, name):
+        return self._data[name][:self._size]
+
+    def clear(self):
+        self._size = 0
+
+    def to_frame(self):
+        return pd.DataFrame({k: v[:self._size] for k, v in self._data.items()})
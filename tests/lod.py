@@ -0,0 +1,136 @@
+import numpy as np
+
+
+# Most points a single line is drawn with; longer visible ranges are downsampled.
+LOD_POINTS = 4000
+
+
+def minmax_indices(y, max_points=LOD_POINTS):
+    """Indices of the first minimum and maximum of <y> in each of max_points // 2 equal buckets, plus both ends"""
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    edges = np.unique(np.linspace(0, n, max(1, max_points // 2) + 1).astype(np.int64))
+    starts = edges[:-1]
+    bucket = np.repeat(np.arange(len(starts)), np.diff(edges))
+
+    picked = [[0, n - 1]]
+    for reduce in (np.fmin, np.fmax):
+        extreme = reduce.reduceat(y, starts)
+        hits = np.flatnonzero(y == extreme[bucket])
+        _, first = np.unique(bucket[hits], return_index=True)
+        picked.append(hits[first])
+    return np.unique(np.concatenate(picked))
+
+
+def lttb_indices(x, y, max_points=LOD_POINTS):
+    """Largest-Triangle-Three-Buckets: per bucket, the point spanning the largest triangle with its neighbours"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if max_points < 3 or n <= max_points:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, max_points - 1).astype(np.int64)
+    picked = np.empty(max_points, dtype=np.int64)
+    picked[0], picked[-1] = 0, n - 1
+
+    a = 0
+    for i in range(max_points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt = slice(hi, edges[i + 2]) if i + 2 < len(edges) else slice(n - 1, n)
+        cx = x[nxt].mean()
+        cy = np.nanmean(y[nxt]) if np.isfinite(y[nxt]).any() else 0.0
+        area = np.abs((x[a] - cx) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (cy - y[a]))
+        a = lo + int(np.argmax(np.nan_to_num(area, nan=-1.0)))
+        picked[i + 1] = a
+    return picked
+
+
+METHODS = {
+    'minmax': lambda x, y, max_points: minmax_indices(y, max_points),
+    'lttb': lttb_indices
+}
+
+
+def downsample(x, y, max_points=LOD_POINTS, method='minmax'):
+    """<x> and <y> reduced to about <max_points> points by <method>, unchanged if already within budget"""
+    x, y = np.asarray(x), np.asarray(y)
+    if len(y) <= max_points:
+        return x, y
+    idx = METHODS[method](x, y, max_points)
+    return x[idx], y[idx]
+
+
+def visible(x, y, lo, hi):
+    """Points of sorted <x> within [lo, hi], widened by one on each side so lines reach the edges"""
+    i = max(int(np.searchsorted(x, lo, side='left')) - 1, 0)
+    j = int(np.searchsorted(x, hi, side='right')) + 1
+    return x[i:j], y[i:j]
+
+
+def plot(ax, y, x=None, max_points=LOD_POINTS, method='minmax', **kwargs):
+    """
+    ax.plot() that draws at most about <max_points> points and redraws the visible range at full
+    resolution, or downsampled again if still over budget, whenever the x limits change.
+    :return: The Line2D.
+    """
+    y = np.asarray(y)
+    x = np.arange(len(y)) if x is None else np.asarray(x)
+    line, = ax.plot(*downsample(x, y, max_points, method), **kwargs)
+
+    if len(y) > max_points:
+        def _refine(axes):
+            lo, hi = axes.get_xlim()
+            line.set_data(*downsample(*visible(x, y, lo, hi), max_points, method))
+
+        for a in ax.get_shared_x_axes().get_siblings(ax):
+            a.callbacks.connect('xlim_changed', _refine)
+    return line
+
+
+def scatter(x, y, max_points=LOD_POINTS, method='minmax', **kwargs):
+    """go.Scatter over <x> and <y> downsampled to <max_points>"""
+    import plotly.graph_objects as go
+    x, y = downsample(x, y, max_points, method)
+    return go.Scatter(x=x, y=y, **kwargs)
+
+
+def _kernel():
+    try:
+        from IPython import get_ipython
+    except ImportError:
+        return False
+    shell = get_ipython()
+    return shell is not None and hasattr(shell, 'kernel')
+
+
+def show(fig, series, max_points=LOD_POINTS, method='minmax'):
+    """
+    Show a figure whose traces were built by scatter() from the full-resolution (x, y) pairs in <series>.
+    Inside a notebook kernel with widget support the figure follows zoom and pan, re-downsampling
+    the visible range; elsewhere it is shown as is.
+    """
+    if not _kernel() or not any(len(y) > max_points for _, y in series):
+        fig.show()
+        return fig
+    try:
+        import plotly.graph_objects as go
+        widget = go.FigureWidget(fig)
+        from IPython.display import display
+    except (ImportError, ValueError):
+        fig.show()
+        return fig
+
+    full = [(np.asarray(x), np.asarray(y)) for x, y in series]
+
+    def _refine(layout, xrange):
+        with widget.batch_update():
+            for trace, (x, y) in zip(widget.data, full):
+                if xrange is None:
+                    trace.x, trace.y = downsample(x, y, max_points, method)
+                else:
+                    trace.x, trace.y = downsample(*visible(x, y, *xrange), max_points, method)
+
+    widget.layout.on_change(_refine, 'xaxis.range')
+    display(widget)
+    return widget
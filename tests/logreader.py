@@ -0,0 +1,41 @@
+import io
+import json
+import mmap
+import pandas as pd
+
+
+ACTIVITIES = b"Activities log:\n"
+TRADE_HISTORY = b"Trade History:\n"
+SECTION_END = b"\n\n\n\n"
+
+
+def _section(mm, header, start=0, until=SECTION_END):
+    """Byte range of the section after <header>, searched from <start>; None if absent"""
+    begin = mm.find(header, start)
+    if begin < 0:
+        return None
+    begin += len(header)
+    end = mm.find(until, begin) if until is not None else -1
+    return begin, end if end >= 0 else len(mm)
+
+
+def read_log(log_file, sep=';'):
+    """
+    Parse an exchange log in one pass over a memory map, without temporary files.
+    :param log_file: Log downloaded from the exchange.
+    :return: Activities as a DataFrame and trade history as a columnar DataFrame; either is None if missing.
+    """
+    activities = trades = None
+
+    with open(log_file, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+
+        span = _section(mm, ACTIVITIES)
+        if span is not None:
+            activities = pd.read_csv(io.BytesIO(mm[span[0]:span[1]]), sep=sep)
+
+        # Trade history follows the activities section and runs to the end of the file.
+        span = _section(mm, TRADE_HISTORY, span[1] if span is not None else 0, until=None)
+        if span is not None:
+            trades = pd.DataFrame.from_records(json.loads(mm[span[0]:span[1]]))
+
+    return activities, trades
@@ -0,0 +1,180 @@
+import numpy as np
+import pandas as pd
+import datamodel
+from datacache import load_columns
+
+
+LEVELS = (1, 2, 3)
+
+
+class MarketData:
+    """Columnar, timestamp-indexed view of a prices frame"""
+
+    def __init__(self, timestamp, product_code, products, bid_price, bid_volume, ask_price, ask_volume, mid_price, day=None):
+        self.timestamp = timestamp
+        self.product_code = product_code
+        self.products = products
+        self.bid_price = bid_price
+        self.bid_volume = bid_volume
+        self.ask_price = ask_price
+        self.ask_volume = ask_volume
+        self.mid_price = mid_price
+        self.day = day
+
+        self.ticks, self.offsets = self._index(timestamp)
+        self._bids = None
+        self._asks = None
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls.from_columns({k: v.to_numpy() for k, v in df.items()})
+
+    @classmethod
+    def from_columns(cls, cols):
+
+        order = np.argsort(cols['timestamp'], kind='stable')
+        codes, products = pd.factorize(cols['product'][order])
+
+        def levels(side):
+            price = np.column_stack([cols[f'{side}_price_{i}'][order] for i in LEVELS]).astype(np.float64)
+            volume = np.column_stack([cols[f'{side}_volume_{i}'][order] for i in LEVELS]).astype(np.float64)
+            return price, volume
+
+        bid_price, bid_volume = levels('bid')
+        ask_price, ask_volume = levels('ask')
+        day = cols['day'][order].astype(np.int64) if 'day' in cols else None
+
+        return cls(cols['timestamp'][order].astype(np.int64),
+                   codes.astype(np.int32),
+                   list(products),
+                   bid_price, bid_volume, ask_price, ask_volume,
+                   cols['mid_price'][order].astype(np.float64),
+                   day)
+
+    @classmethod
+    def from_csv(cls, csv_file, sep=';'):
+        return cls.from_columns(load_columns(csv_file, sep=sep))
+
+    @classmethod
+    def stream(cls, csv_files, chunksize=50000, sep=';'):
+        """Yield (file index, block of whole ticks) from an ordered sequence of timestamp-sorted csv files"""
+        for n, csv_file in enumerate(csv_files):
+            carry = None
+            for chunk in pd.read_csv(csv_file, sep=sep, chunksize=chunksize):
+                if carry is not None:
+                    chunk = pd.concat([carry, chunk])
+                if 'day' not in chunk.columns:
+                    chunk['day'] = n
+                last = chunk['timestamp'].to_numpy() == chunk['timestamp'].iloc[-1]
+                carry = chunk[last]
+                if not last.all():
+                    yield n, cls.from_frame(chunk[~last])
+            if carry is not None and len(carry):
+                yield n, cls.from_frame(carry)
+
+    @staticmethod
+    def _index(timestamp):
+        ticks, starts = np.unique(timestamp, return_index=True)
+        offsets = np.append(starts, len(timestamp)).astype(np.int64)
+        return ticks, offsets
+
+    def rows(self, timestamps):
+        """Row range [start, end) of every requested timestamp, empty for missing ticks"""
+        starts = np.searchsorted(self.timestamp, timestamps, side='left')
+        ends = np.searchsorted(self.timestamp, timestamps, side='right')
+        return starts, ends
+
+    @staticmethod
+    def _side(price, volume, sign):
+        valid = ~np.isnan(volume) & (volume != 0)
+        price = np.where(valid, price, 0).astype(np.int64).tolist()
+        volume = (sign * np.where(valid, volume, 0)).astype(np.int64).tolist()
+        return [[(p, v) for p, v, ok in zip(pr, vr, vm) if ok] for pr, vr, vm in zip(price, volume, valid.tolist())]
+
+    def levels(self):
+        """Per-row lists of (price, volume) book levels, best first; asks carry negative volume"""
+        if self._bids is None:
+            self._bids = self._side(self.bid_price, self.bid_volume, 1)
+            self._asks = self._side(self.ask_price, self.ask_volume, -1)
+        return self._bids, self._asks
+
+
+class TradeData:
+    """Timestamp-sorted columnar view of a trades frame"""
+
+    def __init__(self, timestamp, symbol_code, symbols, price, quantity, buyer, seller):
+        self.timestamp = timestamp
+        self.symbol_code = symbol_code
+        self.symbols = symbols
+        self.price = price
+        self.quantity = quantity
+        self.buyer = buyer
+        self.seller = seller
+        self._lists = None
+        self._trades = None
+
+    def __len__(self):
+        return len(self.timestamp)
+
+    @classmethod
+    def from_frame(cls, df):
+        return cls.from_columns({k: v.to_numpy() for k, v in df.items()})
+
+    @classmethod
+    def from_columns(cls, cols):
+
+        order = np.argsort(cols['timestamp'], kind='stable')
+        codes, symbols = pd.factorize(cols['symbol'][order])
+
+        def names(v):
+            return pd.Series(v[order], dtype=object).fillna("").astype(str).tolist()
+
+        return cls(cols['timestamp'][order].astype(np.int64),
+                   codes.astype(np.int32),
+                   list(symbols),
+                   cols['price'][order].astype(np.float64).astype(np.int64),
+                   cols['quantity'][order].astype(np.int64),
+                   names(cols['buyer']),
+                   names(cols['seller']))
+
+    @classmethod
+    def from_csv(cls, csv_file, sep=';'):
+        return cls.from_columns(load_columns(csv_file, sep=sep))
+
+    def rows(self, lows, highs):
+        """Row range [start, end) of trades with lows <= timestamp < highs"""
+        return np.searchsorted(self.timestamp, lows, side='left'), np.searchsorted(self.timestamp, highs, side='left')
+
+    def _columns(self):
+        if self._lists is None:
+            self._lists = ([self.symbols[c] for c in self.symbol_code.tolist()], self.price.tolist(), self.quantity.tolist(), self.timestamp.tolist())
+        return self._lists
+
+    def trades(self, start, end, out):
+        """Fill <out> with symbol -> [datamodel.CompactTrade] for rows [start, end); Trade objects are built once per row and reused across runs"""
+        symbols, prices, quantities, timestamps = self._columns()
+        if self._trades is None:
+            self._trades = [None] * len(self)
+        cache = self._trades
+
+        for r in range(start, end):
+            trade = cache[r]
+            if trade is None:
+                trade = cache[r] = datamodel.CompactTrade(symbols[r], prices[r], quantities[r], self.buyer[r], self.seller[r], timestamps[r])
+            if symbols[r] not in out:
+                out[symbols[r]] = [trade]
+            else:
+                out[symbols[r]].append(trade)
+        return out
+
+    def volume_by_price(self, start, end, out):
+        """Fill <out> with symbol -> {price: quantity} for rows [start, end)"""
+        symbols, prices, quantities, _ = self._columns()
+
+        for r in range(start, end):
+            levels = out.setdefault(symbols[r], dict())
+            levels[prices[r]] = levels.get(prices[r], 0) + quantities[r]
+        return out
@@ -0,0 +1,175 @@
+import sys
+import time
+import tracemalloc
+import numpy as np
+import pandas as pd
+from ledger import Ledger
+
+
+# Timed phases of a tick; decode and encode happen inside Trader.run and are carved out of strategy
+# when the Trader exposes its traderData codec as CODEC, see Profiler.
+PHASES = ('state', 'strategy', 'decode', 'encode', 'settle')
+
+# Frames of each phase in the folded-stack dump.
+STACKS = {
+    'state': 'tick;state',
+    'strategy': 'tick;run;strategy',
+    'decode': 'tick;run;decode',
+    'encode': 'tick;run;encode',
+    'settle': 'tick;settle'
+}
+
+PROFILE_COLUMNS = {
+    'timestamp': np.int64,
+    'day': np.int64,
+    **{p: np.float64 for p in PHASES},
+    'state_blocks': np.int64,
+    'run_blocks': np.int64,
+    'settle_blocks': np.int64,
+    'traced_peak': np.float64
+}
+
+
+class Profiler:
+    """
+    Opt-in per-tick instrumentation for Simulator.
+    Every tick records wall time per phase with perf_counter and the change in allocated
+    memory blocks across state construction, Trader.run and settlement. Every <trace_every>
+    ticks, tracemalloc also measures the peak traced memory of the tick; those ticks run slower.
+    Decode and encode are timed through the CODEC attribute of the Trader being run (any object with
+    encode() and decode(), e.g. a TraderDataCodec), wrapped only while profiling. The round1 Traders
+    create their codec per instance, so other Traders are unaffected; a codec shared at class level
+    would be timed for every Trader using it.
+    Traders without one, such as those calling jsonpickle directly, record them as NaN and their
+    traderData time stays in strategy.
+    """
+
+    def __init__(self, trace_every=0, capacity=16384):
+        self.trace_every = trace_every
+        self.records = Ledger(PROFILE_COLUMNS, capacity)
+        self._trader = None
+        self._codec = None
+        self._nested = dict.fromkeys(('decode', 'encode'), 0.0)
+        self._row = dict()
+        self._tracing = False
+
+    def __len__(self):
+        return len(self.records)
+
+    def _timed(self, name, fn):
+        nested = self._nested
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                nested[name] += time.perf_counter() - start
+        return timed
+
+    def attach(self, trader):
+        """Profile the run of <trader>; the Simulator calls this before entering the profiler"""
+        self._trader = trader
+        return self
+
+    def start(self):
+        """Begin a run: time traderData decode and encode of the attached Trader's codec, if it has one"""
+        codec = getattr(self._trader, 'CODEC', None)
+        if self._codec is None and hasattr(codec, 'encode') and hasattr(codec, 'decode'):
+            self._codec = codec
+            codec.encode = self._timed('encode', codec.encode)
+            codec.decode = self._timed('decode', codec.decode)
+
+    def stop(self):
+        if self._codec is not None:
+            # The wrappers live on the codec instance and shadow its class methods; removing them restores it.
+            del self._codec.encode, self._codec.decode
+            self._codec = None
+        if self._tracing:
+            tracemalloc.stop()
+            self._tracing = False
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def clear(self):
+        self.records.clear()
+
+    def tick(self):
+        """Mark the start of a tick"""
+        self._nested['decode'] = self._nested['encode'] = 0.0
+        self._row['traced_peak'] = np.nan
+        if self.trace_every and len(self.records) % self.trace_every == 0:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._tracing = True
+            tracemalloc.reset_peak()
+            self._row['traced_peak'] = -tracemalloc.get_traced_memory()[0]
+        self._blocks = sys.getallocatedblocks()
+        self._time = time.perf_counter()
+
+    def lap(self, phase):
+        """Close <phase> ('state', 'run' or 'settle') of the current tick"""
+        now = time.perf_counter()
+        blocks = sys.getallocatedblocks()
+        if phase == 'run':
+            if self._codec is not None:
+                decode, encode = self._nested['decode'], self._nested['encode']
+            else:
+                decode = encode = np.nan
+            self._row['strategy'] = now - self._time - np.nan_to_num(decode + encode)
+            self._row['decode'] = decode
+            self._row['encode'] = encode
+        else:
+            self._row[phase] = now - self._time
+        self._row[f'{phase}_blocks'] = blocks - self._blocks
+        self._blocks = blocks
+        self._time = time.perf_counter()
+
+    def end(self, timestamp, day=0):
+        """Record the current tick"""
+        row = self._row
+        if not np.isnan(row['traced_peak']):
+            row['traced_peak'] += tracemalloc.get_traced_memory()[1]
+            if self._tracing:
+                tracemalloc.stop()
+                self._tracing = False
+        self.records.append(timestamp, day, *(row.get(k, 0) for k in list(PROFILE_COLUMNS)[2:]))
+
+    def to_frame(self):
+        return self.records.to_frame()
+
+    def stats(self):
+        """Per-phase totals, share of tick time and percentiles in microseconds"""
+        rows = []
+        total = sum(np.nansum(self.records.column(p)) for p in PHASES)
+        for p in PHASES:
+            v = self.records.column(p) * 1e6
+            v = v[~np.isnan(v)]
+            rows.append({'phase': p,
+                         'total_ms': v.sum() / 1000 if len(v) else np.nan,
+                         'share': v.sum() / 1e6 / total if total and len(v) else np.nan,
+                         'mean_us': v.mean() if len(v) else np.nan,
+                         'p50_us': np.percentile(v, 50) if len(v) else np.nan,
+                         'p99_us': np.percentile(v, 99) if len(v) else np.nan,
+                         'max_us': v.max() if len(v) else np.nan})
+        return pd.DataFrame(rows).set_index('phase')
+
+    def histogram(self, phase, bins=40):
+        """Counts of per-tick times of <phase> in log-spaced microsecond bins"""
+        v = self.records.column(phase) * 1e6
+        v = v[v > 0]
+        if not len(v):
+            return np.zeros(0, dtype=np.int64), np.zeros(0)
+        edges = np.geomspace(v.min(), v.max() * (1 + 1e-9), bins + 1)
+        return np.histogram(v, bins=edges)
+
+    def dump(self, path):
+        """Write phase totals as folded stacks in microseconds, for flamegraph.pl or speedscope"""
+        with open(path, 'w') as f:
+            for p in PHASES:
+                f.write(f"{STACKS[p]} {int(round(np.nansum(self.records.column(p)) * 1e6))}\n")
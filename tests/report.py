@@ -0,0 +1,177 @@
+import base64
+import html
+import io
+import logging
+import multiprocessing as mp
+import os
+import time
+import numpy as np
+import pandas as pd
+from lod import downsample
+
+
+# Points per series in a static report; a 1000px wide chart cannot show more.
+REPORT_POINTS = 1000
+FIGSIZE = (16, 9)
+DPI = 80
+
+# Figure template reused by every run rendered in this process.
+_TEMPLATE = None
+
+
+def payload(res, max_points=REPORT_POINTS):
+    """
+    Everything a report draws for one result, reduced to <max_points> per series.
+    Much smaller than the result itself, so it is cheap to send to workers or keep for many runs.
+    """
+    n = len(res.accounts)
+    x = np.arange(n)
+    series = {name: {k: downsample(x, v, max_points) for k, v in getattr(res, name).items()} for name in ('pnl', 'position')}
+
+    # Fill edge against the mid price of the tick it happened in: positive is better than mid.
+    ticks = pd.DataFrame({'Day': res.accounts.day[:n], 'TimeStamp': res.accounts.timestamp[:n], 'idx': x})
+    fills = res.transactions.merge(ticks, on=['Day', 'TimeStamp'], how='inner')
+    mid = res.mid_price
+    fills['mid'] = [mid[p][i] for p, i in zip(fills['Product'], fills['idx'])]
+    fills['edge'] = np.where(fills['B/S'] == 'B', fills['mid'] - fills['Price'], fills['Price'] - fills['mid'])
+    if len(fills) > max_points:
+        fills = fills.iloc[np.linspace(0, len(fills) - 1, max_points).astype(np.int64)]
+
+    return {'series': series, 'fills': fills[['Product', 'B/S', 'idx', 'Quantity', 'edge']].reset_index(drop=True),
+            'stats': res.stats(), 'ticks': n}
+
+
+def _template():
+    global _TEMPLATE
+    if _TEMPLATE is None:
+        # A bare Figure renders with Agg and leaves the pyplot backend of an interactive session alone.
+        from matplotlib.figure import Figure
+        fig = Figure(figsize=FIGSIZE, dpi=DPI)
+        axs = fig.subplots(2, 2)
+        fig.subplots_adjust(left=0.05, right=0.98, hspace=0.3, wspace=0.3)
+        _TEMPLATE = fig, axs.ravel()
+    return _TEMPLATE
+
+
+def _draw(name, data):
+    """PNG bytes of one run drawn into the process' figure template"""
+    fig, (ax_pnl, ax_pos, ax_fill, ax_dd) = _template()
+    for ax in (ax_pnl, ax_pos, ax_fill, ax_dd):
+        ax.cla()
+    fig.suptitle(name)
+
+    colors = dict()
+    for k, (x, y) in data['series']['pnl'].items():
+        line, = ax_pnl.plot(x, y, label=k, c='black' if k == 'total' else None, lw=1.5 if k == 'total' else 1.0)
+        colors[k] = line.get_color()
+    ax_pnl.set_title('PnL')
+    ax_pnl.legend(loc='upper left')
+
+    for k, (x, y) in data['series']['position'].items():
+        ax_pos.plot(x, y, label=k, c=colors.get(k), lw=0.8)
+    ax_pos.set_title('Position')
+    ax_pos.axhline(0, c='grey', lw=0.5)
+
+    fills = data['fills']
+    for (product, side), f in fills.groupby(['Product', 'B/S'], sort=True):
+        ax_fill.scatter(f['idx'], f['edge'], s=4 + 2 * f['Quantity'], color=colors.get(product), marker='^' if side == 'B' else 'v', alpha=0.6,
+                        label=f'{product} {side}')
+    ax_fill.set_title('Fill edge vs mid')
+    ax_fill.axhline(0, c='grey', lw=0.5)
+    if len(fills):
+        ax_fill.legend(loc='upper left', fontsize='small', ncol=2)
+
+    stats = data['stats']
+    rows = stats.index[stats.index != 'total']
+    ax_dd.barh(list(rows), stats.loc[rows, 'pnl'], color=[colors.get(p) for p in rows], label='PnL')
+    ax_dd.barh(list(rows), -stats.loc[rows, 'max_drawdown'], color='lightgrey', label='Max drawdown')
+    ax_dd.set_title('PnL and max drawdown')
+    ax_dd.axvline(0, c='grey', lw=0.5)
+    ax_dd.legend(loc='lower right', fontsize='small')
+
+    for ax in (ax_pnl, ax_pos, ax_fill):
+        ax.set_xlim(0, max(data['ticks'] - 1, 1))
+
+    buf = io.BytesIO()
+    fig.savefig(buf, format='png', dpi=DPI)
+    return buf.getvalue()
+
+
+def _render(task):
+    name, data = task
+    return name, _draw(name, data)
+
+
+def overview(stats):
+    """One row per run: total figures and per-product PnL, best total PnL first"""
+    rows = dict()
+    for name, s in stats.items():
+        total = s.loc['total']
+        rows[name] = {'pnl': total['pnl'], 'max_drawdown': total['max_drawdown'], 'fills': int(total['buys'] + total['sells']),
+                      'turnover': total['turnover'], **{f'pnl[{p}]': s.at[p, 'pnl'] for p in s.index if p != 'total'}}
+    table = pd.DataFrame.from_dict(rows, orient='index')
+    table.index.name = 'run'
+    return table.sort_values('pnl', ascending=False, kind='stable')
+
+
+def _anchor(name):
+    return 'run-' + ''.join(c if c.isalnum() else '-' for c in str(name))
+
+
+def _html(title, table, images, stats):
+    links = table.copy()
+    links.index = [f'<a href="#{_anchor(n)}">{html.escape(str(n))}</a>' for n in table.index]
+    parts = ['<!DOCTYPE html>', '<html><head><meta charset="utf-8">', f'<title>{html.escape(title)}</title>',
+             '<style>body{font-family:sans-serif;margin:2em}table{border-collapse:collapse;font-size:13px}'
+             'td,th{padding:2px 8px;text-align:right}tr:nth-child(even){background:#f4f4f4}img{max-width:100%}</style>',
+             '</head><body>', f'<h1>{html.escape(title)}</h1>',
+             f'<p>{len(table)} runs, generated {time.strftime("%Y-%m-%d %H:%M:%S")}</p>',
+             links.to_html(float_format='{:.1f}'.format, escape=False)]
+    for name in table.index:
+        parts += [f'<h2 id="{_anchor(name)}">{html.escape(str(name))}</h2>',
+                  f'<img src="data:image/png;base64,{base64.b64encode(images[name]).decode()}">',
+                  stats[name].to_html(float_format='{:.1f}'.format)]
+    parts.append('</body></html>')
+    return '\n'.join(parts)
+
+
+def write(results, path, title='Backtest report', processes=None, max_points=REPORT_POINTS, png_dir=None):
+    """
+    Render many results headlessly into one self-contained HTML file.
+    Each run gets PnL, position, fill edge and drawdown charts plus its stats table; an overview
+    table ranks all runs by total PnL. Charts are drawn in a process pool with matplotlib's Agg renderer.
+    :param results: Mapping of run name to a result, or to its payload() if already reduced.
+    :param path: HTML file to write.
+    :param processes: Worker count, defaults to os.cpu_count(); 1 renders in this process.
+    :param max_points: Points per series drawn.
+    :param png_dir: If given, also save every chart there as <rank>-<run>.png.
+    :return: The overview table.
+    """
+    start = time.perf_counter()
+    data = {name: r if isinstance(r, dict) else payload(r, max_points) for name, r in results.items() if r is not None}
+    skipped = [name for name, r in results.items() if r is None]
+    if skipped:
+        logging.info(f'-> No result for {skipped}, left out of the report')
+
+    tasks = list(data.items())
+    processes = min(processes or os.cpu_count(), max(len(tasks), 1))
+    if processes == 1:
+        images = dict(_render(t) for t in tasks)
+    else:
+        ctx = mp.get_context('fork') if 'fork' in mp.get_all_start_methods() else mp.get_context()
+        with ctx.Pool(processes) as pool:
+            images = dict(pool.imap_unordered(_render, tasks))
+
+    stats = {name: d['stats'] for name, d in data.items()}
+    table = overview(stats)
+    with open(path, 'w') as f:
+        f.write(_html(title, table, images, stats))
+
+    if png_dir is not None:
+        os.makedirs(png_dir, exist_ok=True)
+        for rank, name in enumerate(table.index):
+            with open(os.path.join(png_dir, f'{rank:03d}-{_anchor(name)[4:]}.png'), 'wb') as f:
+                f.write(images[name])
+
+    logging.info(f'Report of {len(tasks)} runs written to {path} in {time.perf_counter() - start:.1f}s on {processes} processes')
+    return table
@@ -1,7 +1,133 @@
+import base64
+import copy
+import json
+from array import array
+from collections import deque
 from datamodel import OrderDepth, UserId, TradingState, Order
 from typing import List
-import jsonpickle as jp
-import numpy as np
+
+
+# Defined here rather than in a shared module: the exchange runs this file on its own.
+# New Trader files copy these classes from round1_11.py.
+TRADER_DATA_LIMIT = 50000
+
+
+class TraderDataCodec:
+    """
+    Fixed-layout traderData encoding for a Trader's memo dict.
+    <schema> maps every memo key to (kind, default). Kind 'json' stores the value as is;
+    an array typecode ('i', 'l', 'd', ...) packs a list of numbers as base64;
+    a class with dump()/load() stores its dump().
+    A callable default is called for a fresh value, anything else is deep-copied.
+    The memo is encoded as a JSON list in schema order, so keys are never written.
+    """
+
+    def __init__(self, schema, limit=TRADER_DATA_LIMIT):
+        self.schema = schema
+        self.limit = limit
+        # Last (traderData, memo) pair; lets decode() skip parsing its own previous output.
+        # The memo must not be modified between encode() and the next decode().
+        self._encoded = None
+        self._memo = None
+
+    def defaults(self):
+        return {k: default() if callable(default) else copy.deepcopy(default) for k, (_, default) in self.schema.items()}
+
+    def encode(self, memo):
+        values = []
+        for k, (kind, _) in self.schema.items():
+            v = memo[k]
+            if isinstance(kind, type):
+                v = v.dump()
+            elif kind != 'json':
+                v = base64.b64encode(array(kind, v).tobytes()).decode('ascii')
+            values.append(v)
+
+        encoded = json.dumps(values, separators=(',', ':'))
+        if len(encoded) > self.limit:
+            raise ValueError(f'traderData is {len(encoded)} characters, over the limit of {self.limit}')
+
+        self._encoded, self._memo = encoded, memo
+        return encoded
+
+    def decode(self, encoded):
+        if not encoded:
+            return self.defaults()
+        if encoded == self._encoded:
+            return self._memo
+
+        values = json.loads(encoded)
+        if isinstance(values, dict):
+            # Plain JSON memo written before the schema existed.
+            return {**self.defaults(), **values}
+
+        memo = dict()
+        for (k, (kind, _)), v in zip(self.schema.items(), values):
+            if isinstance(kind, type):
+                v = kind.load(v)
+            elif kind != 'json':
+                v = array(kind, base64.b64decode(v)).tolist()
+            memo[k] = v
+        return memo
+
+
+class LotQueue:
+    """
+    FIFO inventory as (price, quantity) lots on one side: 1 long, -1 short, 0 flat.
+    Trades on the same side add a lot, trades on the other side consume lots from the front.
+    """
+
+    def __init__(self, side=0, lots=()):
+        self.side = side
+        self.lots = deque([p, q] for p, q in lots)
+        self.quantity = sum(q for _, q in self.lots)
+        self.notional = sum(p * q for p, q in self.lots)
+
+    def __len__(self):
+        return self.quantity
+
+    def _push(self, price, quantity):
+        if self.lots and self.lots[-1][0] == price:
+            self.lots[-1][1] += quantity
+        else:
+            self.lots.append([price, quantity])
+        self.quantity += quantity
+        self.notional += price * quantity
+
+    def trade(self, price, quantity, direction):
+        """Apply <quantity> units traded at <price>; <direction> is 1 for a buy, -1 for a sell"""
+        while quantity > 0:
+            if self.side == 0:
+                self._push(price, quantity)
+                self.side = direction
+                return
+            if direction == 0:
+                return
+            if direction == self.side:
+                self._push(price, quantity)
+                return
+
+            lot = self.lots[0]
+            done = min(quantity, lot[1])
+            lot[1] -= done
+            quantity -= done
+            self.quantity -= done
+            self.notional -= lot[0] * done
+            if lot[1] == 0:
+                self.lots.popleft()
+            if not self.lots:
+                self.side = 0
+
+    def average_cost(self):
+        return self.notional / self.quantity if self.quantity else None
+
+    def dump(self):
+        return [self.side, [x for lot in self.lots for x in lot]]
+
+    @classmethod
+    def load(cls, state):
+        side, flat = state
+        return cls(side, zip(flat[::2], flat[1::2]))
 
 
 class STRATEGY:
@@ -15,10 +141,20 @@ class STRATEGY:
     def __init__(self):
         self.orders = []
 
+    def reset(self):
+        self.orders = []
+        return self
+
     @staticmethod
-    def hit_the_book(product, order_depth, buy_capacity, buy_price, sell_capacity, sell_price):
-        sorted_buy_orders = sorted(order_depth.buy_orders.items(), reverse=True)
-        sorted_sell_orders = sorted(order_depth.sell_orders.items(), reverse=False)
+    def sorted_levels(order_book, reverse=False):
+        # Books built by the simulator carry their levels pre-sorted best first.
+        levels = getattr(order_book, 'levels', None)
+        return levels if levels is not None else sorted(order_book.items(), reverse=reverse)
+
+    @classmethod
+    def hit_the_book(cls, product, order_depth, buy_capacity, buy_price, sell_capacity, sell_price):
+        sorted_buy_orders = cls.sorted_levels(order_depth.buy_orders, reverse=True)
+        sorted_sell_orders = cls.sorted_levels(order_depth.sell_orders, reverse=False)
         orders = []
         for p, vol in sorted_buy_orders:
             vol = abs(vol)
@@ -39,7 +175,9 @@ class STRATEGY:
 
     @staticmethod
     def calculate_barrier_price(order_book, threshold=1, ignore_below=None, ignore_above=None):
-        if any(v < 0 for v in order_book.values()):
+        if getattr(order_book, 'levels', None) is not None:
+            order_book = order_book.levels
+        elif any(v < 0 for v in order_book.values()):
             order_book = sorted(order_book.items())
         else:
             order_book = sorted(order_book.items(), reverse=True)
@@ -123,27 +261,7 @@ class KELP_STRATEGY(STRATEGY):
                         direction = 1
                     elif trade.seller == 'SUBMISSION': 
                         direction = -1
-                    for _ in range(int(abs(q))):
-
-                        if memo['kelp_status'] == 0:
-                            memo['kelp_cost_basis'] += [p]
-                            memo['kelp_status'] = direction
-
-                        elif memo['kelp_status'] < 0:
-                            if direction == 1:
-                                memo['kelp_cost_basis'] = memo['kelp_cost_basis'][1:]
-                                if not memo['kelp_cost_basis']:
-                                    memo['kelp_status'] = 0
-                            elif direction == -1:
-                                memo['kelp_cost_basis'] = memo['kelp_cost_basis'] + [p]
-                    
-                        elif memo['kelp_status'] > 0:
-                            if direction == 1:
-                                memo['kelp_cost_basis'] = memo['kelp_cost_basis'] + [p]
-                            elif direction == -1:
-                                memo['kelp_cost_basis'] = memo['kelp_cost_basis'][1:]
-                                if not memo['kelp_cost_basis']:
-                                    memo['kelp_status'] = 0
+                    memo['kelp_lots'].trade(p, int(abs(q)), direction)
         
 
         current_position = state.position.get(self.product, 0)
@@ -151,9 +269,7 @@ class KELP_STRATEGY(STRATEGY):
         sell_capacity = self.LIMIT[self.product] + current_position
         buy_capacity = self.LIMIT[self.product] - current_position
 
-        average_cost = None
-        if memo['kelp_cost_basis']:
-            average_cost = np.average(memo['kelp_cost_basis'])
+        average_cost = memo['kelp_lots'].average_cost()
 
 
         bbp = self.calculate_barrier_price(order_depth.buy_orders, threshold=15)
@@ -321,12 +437,12 @@ class SQUID_INK_STRATEGY(STRATEGY):
 
 class Trader:
 
-    MEMO = {
-        'rr_liquidation_sell': 0,
-        'rr_liquidation_buy': 0,
-        'kelp_cost_basis': [],
-        'kelp_status': 0
-    }
+    CODEC = TraderDataCodec({
+        'rr_liquidation_sell': ('json', 0),
+        'rr_liquidation_buy': ('json', 0),
+        'kelp_lots': (LotQueue, LotQueue)
+    })
+    MEMO = CODEC.defaults()
 
     STRATEGY = {
         'RAINFOREST_RESIN': RAINFOREST_RESIN_STRATEGY,
@@ -334,14 +450,19 @@ class Trader:
         'SQUID_INK': SQUID_INK_STRATEGY
     }
 
+    def __init__(self):
+        # One strategy object per product for the whole run, reset every tick.
+        self.strategies = {product: cls() for product, cls in self.STRATEGY.items()}
+        # A codec of its own: its last-encoded cache holds this Trader's live memo.
+        self.CODEC = TraderDataCodec(self.CODEC.schema, self.CODEC.limit)
+
     def run(self, state: TradingState):
 
-        if state.traderData != "":
-            self.MEMO = jp.decode(state.traderData)
+        self.MEMO = self.CODEC.decode(state.traderData)
 
         result = {}
 
         for product in state.order_depths:
-            result[product] = self.STRATEGY[product]().act(state, self.MEMO)
+            result[product] = self.strategies[product].reset().act(state, self.MEMO)
 
-        return result, None, jp.encode(self.MEMO)
\ No newline at end of file
+        return result, None, self.CODEC.encode(self.MEMO)
\ No newline at end of file
@@ -1,13 +1,17 @@
+from contextlib import nullcontext
 from dataclasses import dataclass
-from collections import defaultdict
 import logging
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 import datamodel
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from marketdata import MarketData, TradeData
+from datacache import read_frame
+from logreader import read_log
+from ledger import Ledger
+from fillmodel import CrossFillModel
+from accounting import Accounts
+import lod
+from lod import LOD_POINTS
 
 
 POSITION_LIMIT = {
@@ -15,41 +19,72 @@ POSITION_LIMIT = {
     'KELP': 50
 }
 
+TRANSACTION_COLUMNS = {
+    'TimeStamp': np.int64,
+    'B/S': object,
+    'Quantity': np.int64,
+    'Product': object,
+    'Price': np.int64,
+    'Day': np.int64
+}
+
 
 @dataclass
 class result:
     """Class for simulation result"""
     logging.basicConfig(format='%(message)s', level=logging.INFO)
 
-    pnl: defaultdict
     transactions: pd.DataFrame
-    mid_price: defaultdict
-    position: defaultdict
+    accounts: Accounts
+
+    @property
+    def pnl(self):
+        return {**self.accounts.series('pnl'), 'total': self.accounts.total_pnl[:len(self.accounts)]}
+
+    @property
+    def position(self):
+        return self.accounts.series('position')
+
+    @property
+    def mid_price(self):
+        return self.accounts.series('mid_price')
+
+    def stats(self):
+        return self.accounts.stats()
+
+    @staticmethod
+    def table(results):
+        """Final stats of many runs side by side, keyed by run"""
+        return pd.concat({k: r.stats() for k, r in results.items()}, names=['run'])
+
+    @staticmethod
+    def report(results, path, **kwargs):
+        """Static HTML report of many runs, keyed by run; see report.write"""
+        import report
+        return report.write(results, path, **kwargs)
 
-    def summary(self, verbose=False):
+    def summary(self, verbose=False, max_points=LOD_POINTS):
+        import matplotlib.pyplot as plt
 
-        product_list = list(self.pnl.keys())
-        product_list.remove('total')
+        stats = self.stats()
+        product_list = self.accounts.products
 
-        for k, v in self.pnl.items():
-            logging.info(f" -> {k}: {v[-1]:.1f}")
+        for k, v in stats['pnl'].items():
+            logging.info(f" -> {k}: {v:.1f}")
         
         logging.info('\n')
 
         total_transaction_amt = len(self.transactions)        
         logging.info(f"# of transaction is {total_transaction_amt:d}")
         for k in product_list:
-            buy = self.transactions[(self.transactions['Product'] == k) & (self.transactions['B/S'] == 'B')]
-            sell = self.transactions[(self.transactions['Product'] == k) & (self.transactions['B/S'] == 'S')]
-            total_v = len(buy) + len(sell)
-            logging.info(f" -> {k}: B({len(buy):>3d}) + S({len(sell):>3d})")
+            logging.info(f" -> {k}: B({stats.at[k, 'buys']:>3d}) + S({stats.at[k, 'sells']:>3d})")
 
         if not verbose:
             fig, ax = plt.subplots(1, 1)
             legends = []
             for k, v in self.pnl.items():
                 ax.set_title("PnL")
-                ax.plot(v)
+                lod.plot(ax, v, max_points=max_points)
                 legends.append(k)
             ax.legend(legends)
 
@@ -59,18 +94,19 @@ class result:
             for i, (k, v) in enumerate(self.pnl.items()):
                 if k != 'total':
                     axs[i][0].set_title(k)
-                    axs[i][0].plot(v)   
+                    lod.plot(axs[i][0], v, max_points=max_points)
                     axs[i][0].legend(["Pnl"])
               
                     axs[i][1].set_title(k)
-                    axs[i][1].plot(self.position[k])
+                    lod.plot(axs[i][1], self.position[k], max_points=max_points)
                     ax2 = axs[i][1].twinx()
-                    ax2.plot(self.mid_price[k], c='orange', alpha=0.5)
+                    lod.plot(ax2, self.mid_price[k], max_points=max_points, c='orange', alpha=0.5)
                     axs[i][1].set_ylim([-POSITION_LIMIT[k], POSITION_LIMIT[k]])
 
     
     @staticmethod
     def compare(r1, r2, product, display_buy=True, display_sell=True):
+        import plotly.express as px
 
         r1 = r1.transactions[r1.transactions['Product'] == product]
         r2 = r2.transactions[r2.transactions['Product'] == product]
@@ -97,6 +133,7 @@ class result:
 
     @staticmethod
     def compare_diff(r1, r2, product, display_buy=True, display_sell=True):
+        import plotly.express as px
 
         r1 = r1.transactions[r1.transactions['Product'] == product]
         r2 = r2.transactions[r2.transactions['Product'] == product]
@@ -121,62 +158,76 @@ class Simulator:
 
     logging.basicConfig(format='%(message)s', level=logging.INFO)
 
-    def __init__(self, csv_file=None, log_file=None, sep=';'):
-
-        if csv_file is not None:
-            self.df = pd.read_csv(csv_file, sep=sep)
+    def __init__(self, csv_file=None, log_file=None, sep=';', data=None, trades_file=None, trades=None, fill_model=None, profiler=None, snapshot=False):
+
+        self.fill_model = fill_model if fill_model is not None else CrossFillModel()
+        self.profiler = profiler
+        # By default one TradingState and its dicts are refilled every tick; with <snapshot>
+        # each tick gets its own state and copies of its dicts and trade lists, for Traders that
+        # keep references to past states. The copy is shallow, not frozen: Listing and Trade objects
+        # are shared across ticks (and market trades across runs), so Traders must not modify them.
+        self.snapshot = snapshot
+
+        if trades is None and trades_file is not None:
+            trades = TradeData.from_csv(trades_file, sep=sep)
+        self.trades = trades
+
+        if data is not None:
+            self.df = None
+        elif csv_file is not None:
+            self.df = read_frame(csv_file, sep=sep)
+            data = MarketData.from_frame(self.df)
         elif log_file is not None:
             self.df = self._read_log(log_file)
+            data = MarketData.from_frame(self.df)
 
-        self.product = self.df['product'].unique().tolist()
-        self.last_price_ = defaultdict(list)
+        self.data = data
+        self.product = list(data.products) if data is not None else []
 
         self.traderdata = ""
-        self.timestamp = np.arange(0, self.df['timestamp'].max() + 100, 100)
+        self.day_ = 0
+        self.last_tick_ = None
+        self.timestamp = np.arange(0, data.timestamp.max() + 100, 100) if data is not None else None
         self.order_depths_ = dict()
         self.own_trades_ = dict()
         self.listings_ = dict()
         self.market_trades_ = dict()
-        self.position_ = defaultdict(lambda: [0])
+        self.tick_trades_ = dict()
         self.observations_ = dict() 
-        self.pnl_ = defaultdict(lambda: [0])
-        self.cost_basis_ = defaultdict(float)
-        self.records = pd.DataFrame(columns=['TimeStamp', 'B/S', 'Quantity', "Product", 'Price'])
+        self.listing_cache_ = dict()
+        self.state_ = datamodel.CompactTradingState(self.traderdata, 0, self.listings_, self.order_depths_, self.own_trades_, self.market_trades_, dict(), self.observations_)
+        self.accounts = Accounts(self.product)
+        self.records = Ledger(TRANSACTION_COLUMNS)
 
 
     @staticmethod
-    def _read_log(log_file, tmp_file=r"/Users/ysc/Desktop/imcProsperity/cache/tmp_.csv"):
-        with open(log_file) as f:
-            tmp = f.read()
-            start = tmp.find("Activities log:") + 16
-            end = tmp.find("\n\n\n\n", start)
-            tmp = tmp[start:end]
-        with open(tmp_file, mode='w') as f:
-            f.write(tmp)
-        return pd.read_csv(tmp_file, sep=";")
+    def _read_log(log_file):
+        activities, _ = read_log(log_file)
+        return activities
 
 
     def _clear(self):
         self.order_depths_.clear()
         self.listings_.clear()
         self.market_trades_.clear()
+        self.tick_trades_.clear()
         self.observations_.clear() 
 
 
     def _reset(self):
         self._clear()
         self.traderdata = ""
+        self.day_ = 0
+        self.last_tick_ = None
         self.own_trades_.clear()
-        self.position_ = defaultdict(lambda: [0])
-        self.pnl_ = defaultdict(lambda: [0])
-        self.cost_basis_ = defaultdict(float)
-        self.records = pd.DataFrame(columns=['TimeStamp', 'B/S', 'Quantity', "Product", 'Price'])
+        self.accounts = Accounts(self.product)
+        self.records = Ledger(TRANSACTION_COLUMNS)
 
 
     def _breach_or_not(self):
         breach_item = []
         for k, v in POSITION_LIMIT.items():
-            if abs(self.position_[k][-1]) > v:
+            if abs(self.accounts.position(k)) > v:
                 breach_item += [k]
         return breach_item
 
@@ -186,94 +237,138 @@ class Simulator:
         self.own_trades_.clear()
 
         for product in self.product:
-            
-            new_position = self.position_[product][-1]
 
             if product in orders:
                 
-                order_depth = self.order_depths_[product]
-                order = orders[product]
-
-                sorted_buy_orders = list(map(list, sorted(order_depth.buy_orders.items(), reverse=True)))
-                sorted_sell_orders = list(map(list, sorted(order_depth.sell_orders.items(), reverse=False)))
-
-                for o in order:
-                    price, quantity = o.price, o.quantity
-                    
-                    if quantity > 0:
-                        for v in sorted_sell_orders:
-                            if price >= v[0] and abs(v[1]) > 0 and quantity > 0:
-                                done = min(quantity, abs(v[1]))
-                                quantity -= done
-                                new_position += done 
-                                if product not in self.own_trades_:
-                                    self.own_trades_[product] = [datamodel.Trade(product, v[0], done, self.traderdata, "", timestamp)]
-                                else:
-                                    self.own_trades_[product].append(datamodel.Trade(product, v[0], done, self.traderdata, "", timestamp))
-                                self.cost_basis_[product] -= done * v[0]
-                                self.records.loc[len(self.records)] = timestamp, 'B', done, product, v[0]
-                                v[1] += done
-
-                    elif quantity < 0:
-                        for v in sorted_buy_orders:
-                            if price <= v[0] and v[1] > 0 and quantity < 0:
-                                done = min(abs(quantity), v[1])
-                                quantity += done
-                                new_position -= done 
-                                if product not in self.own_trades_:
-                                    self.own_trades_[product] = [datamodel.Trade(product, v[0], -done, "", self.traderdata, timestamp)]
-                                else:
-                                    self.own_trades_[product].append(datamodel.Trade(product, v[0], -done, "", self.traderdata, timestamp))
-                                self.cost_basis_[product] += done * v[0]
-                                self.records.loc[len(self.records)] = timestamp, 'S', done, product, v[0]
-                                v[1] -= done
+                fills, _ = self.fill_model.fill(self.order_depths_[product], orders[product], self.tick_trades_.get(product))
+
+                for price, done in fills:
+                    self.accounts.fill(product, price, done)
+                    if done > 0:
+                        trade = datamodel.CompactTrade(product, price, done, self.traderdata, "", timestamp)
+                        self.records.append(timestamp, 'B', done, product, price, self.day_)
+                    else:
+                        trade = datamodel.CompactTrade(product, price, done, "", self.traderdata, timestamp)
+                        self.records.append(timestamp, 'S', -done, product, price, self.day_)
+                    if product not in self.own_trades_:
+                        self.own_trades_[product] = [trade]
+                    else:
+                        self.own_trades_[product].append(trade)
+
+        self.accounts.mark(timestamp, self.day_)
+
+
+    def _run(self, Trader, data, timestamps, cur_state, trades=None):
+
+        products = data.products
+        for product_ in products:
+            if product_ not in self.product:
+                self.product.append(product_)
+                self.accounts.add_product(product_)
+            if product_ not in self.listing_cache_:
+                self.listing_cache_[product_] = datamodel.CompactListing(product_, product_, 'SEASHELLS')
+        listings = self.listing_cache_
+
+        codes = data.product_code.tolist()
+        mid_prices = data.mid_price.tolist()
+        days = data.day.tolist() if data.day is not None else None
+        bids, asks = data.levels()
+        starts, ends = data.rows(timestamps)
+
+        # Market trades shown at a tick are those printed since the previous tick;
+        # the fill model sees those printed until the next one.
+        if trades is not None:
+            lows = np.concatenate([[timestamps[0] if self.last_tick_ is None else self.last_tick_], timestamps[:-1]])
+            highs = np.concatenate([timestamps[1:], [timestamps[-1] + 100]])
+            trade_starts, trade_ends = trades.rows(lows, timestamps)
+            _, next_ends = trades.rows(timestamps, highs)
+        else:
+            trade_starts = trade_ends = next_ends = np.zeros(len(timestamps), dtype=np.int64)
+
+        prof = self.profiler
+        for timestamp_, start, end, trade_start, trade_end, next_end in zip(timestamps.tolist(), starts.tolist(), ends.tolist(), trade_starts.tolist(), trade_ends.tolist(), next_ends.tolist()):
             
-            self.position_[product] += [new_position]
-            self.pnl_[product] += [ self.cost_basis_[product] + self.last_price_[product][-1] * self.position_[product][-1] ]
+            if prof is not None:
+                prof.tick()
+            self._clear()
+            self.last_tick_ = timestamp_
+            if days is not None and start < end:
+                self.day_ = days[start]
+            if trade_start < trade_end:
+                trades.trades(trade_start, trade_end, self.market_trades_)
+            if self.fill_model.uses_trades and trade_end < next_end:
+                trades.volume_by_price(trade_end, next_end, self.tick_trades_)
+
+            for r in range(start, end):
+                
+                product_ = products[codes[r]]
+                self.accounts.set_mid(product_, mid_prices[r])
+
+                self.listings_[product_] = listings[product_]
+                self.order_depths_[product_] = datamodel.BookDepth(bids[r], asks[r])
+
+            position__ = self.accounts.positions()
+
+            if self.snapshot:
+                tradingstate_ = datamodel.CompactTradingState(cur_state, timestamp_, dict(self.listings_), dict(self.order_depths_),
+                                                              {k: list(v) for k, v in self.own_trades_.items()},
+                                                              {k: list(v) for k, v in self.market_trades_.items()},
+                                                              position__, dict(self.observations_))
+            else:
+                tradingstate_ = self.state_
+                tradingstate_.traderData = cur_state
+                tradingstate_.timestamp = timestamp_
+                tradingstate_.position = position__
+            if prof is not None:
+                prof.lap('state')
+            orders, _, cur_state = Trader.run(tradingstate_)
+            if prof is not None:
+                prof.lap('run')
 
-        self.pnl_['total'] += [ sum(self.pnl_[product][-1] for product in self.product) ]
+            self._settle(orders, timestamp_)
+
+            breach_test = self._breach_or_not()
+            if prof is not None:
+                prof.lap('settle')
+                prof.end(timestamp_, self.day_)
+            if breach_test:
+                logging.error(f"-> Breach Occurs at day {self.day_} timestamp {timestamp_} for {breach_test}")
+                return False, cur_state
+        
+        return True, cur_state
 
 
     def simulate(self, Trader):
 
-        cur_state = ""
         self._reset()
 
-        for timestamp_ in self.timestamp:
-            
-            self._clear()
-
-            tmp = self.df[self.df['timestamp'] == timestamp_]
-            for _, row in tmp.iterrows():
-                
-                product_ = row['product']
-                self.last_price_[product_] += [row['mid_price']]
-
-                self.listings_[product_] = datamodel.Listing(product_, product_, 'SEASHELLS')
-                self.order_depths_[product_] = datamodel.OrderDepth()
+        with self.profiler.attach(Trader) if self.profiler is not None else nullcontext():
+            ok, _ = self._run(Trader, self.data, self.timestamp, "", self.trades)
+        if not ok:
+            return None
 
-                dict_ = dict()
-                for i in (1, 2, 3):
-                    if row[f'bid_volume_{i}'] != 0 and not np.isnan(row[f'bid_volume_{i}']):
-                        dict_[row[f'bid_price_{i}']] = row[f'bid_volume_{i}']
-                self.order_depths_[product_].buy_orders = dict_
-                
-                dict_ = dict()
-                for i in (1, 2, 3):
-                    if row[f'ask_volume_{i}'] != 0 and not np.isnan(row[f'ask_volume_{i}']):
-                        dict_[row[f'ask_price_{i}']] = -row[f'ask_volume_{i}']
-                self.order_depths_[product_].sell_orders = dict_
-
-            position__ = {k: v[-1] for k, v in self.position_.items()}
+        return result(self.records.to_frame(), self.accounts)
 
-            tradingstate_ = datamodel.TradingState(cur_state, timestamp_, self.listings_, self.order_depths_, self.own_trades_, self.market_trades_, position__, self.observations_)
-            orders, _, cur_state = Trader.run(tradingstate_)
 
-            self._settle(orders, timestamp_)
+    def simulate_days(self, Trader, csv_files, trades_files=None, chunksize=50000, sep=';'):
+        """
+        Run one continuous simulation over an ordered sequence of day files.
+        Files are streamed in chunks of whole ticks, so market data memory is bounded by <chunksize>;
+        positions, traderData and PnL carry over day boundaries.
+        If given, <trades_files> are matched to <csv_files> by position and loaded one day at a time.
+        """
+        self._reset()
+        self.product = []
 
-            breach_test = self._breach_or_not()
-            if breach_test:
-                logging.error(f"-> Breach Occurs at timestamp {timestamp_} for {breach_test}")
-                return None
-        
-        return result(self.pnl_, self.records, self.last_price_, self.position_)
\ No newline at end of file
+        cur_state = ""
+        current, trades = None, None
+        with self.profiler.attach(Trader) if self.profiler is not None else nullcontext():
+            for n, data in MarketData.stream(csv_files, chunksize=chunksize, sep=sep):
+                if n != current:
+                    current, self.last_tick_ = n, None
+                    trades = TradeData.from_csv(trades_files[n], sep=sep) if trades_files is not None else None
+                ok, cur_state = self._run(Trader, data, data.ticks, cur_state, trades)
+                if not ok:
+                    return None
+
+        return result(self.records.to_frame(), self.accounts)
@@ -0,0 +1,132 @@
+import argparse
+import copy
+import importlib
+import itertools
+import json
+import logging
+import multiprocessing as mp
+import os
+import sys
+import numpy as np
+import pandas as pd
+from marketdata import MarketData, TradeData
+from simulator import Simulator
+
+
+# Market data per day label of the running sweep(), loaded once in the parent and inherited by forked workers.
+_DAYS = dict()
+
+
+def grid(params):
+    """Expand {'CLASS.attr': [v1, v2], ...} into a list of configs"""
+    keys = list(params)
+    return [dict(zip(keys, values)) for values in itertools.product(*(params[k] for k in keys))]
+
+
+def _apply(trader_cls, config):
+    module = sys.modules[trader_cls.__module__]
+    for key, value in config.items():
+        owner, _, attr = key.rpartition('.')
+        target = getattr(module, owner) if owner else trader_cls
+        setattr(target, attr, value)
+
+
+def _init(days):
+    for day, files in days.items():
+        prices_file, trades_file = files if isinstance(files, (tuple, list)) else (files, None)
+        source = os.path.abspath(prices_file), os.path.abspath(trades_file) if trades_file is not None else None
+        if day not in _DAYS or _DAYS[day][0] != source:
+            _DAYS[day] = source, MarketData.from_csv(prices_file), TradeData.from_csv(trades_file) if trades_file is not None else None
+
+
+def _run(task):
+    n, trader_cls, config, day = task
+    _apply(trader_cls, config)
+
+    trader = trader_cls()
+    if hasattr(trader_cls, 'MEMO'):
+        trader.MEMO = copy.deepcopy(trader_cls.MEMO)
+
+    _, data, trades = _DAYS[day]
+    sim = Simulator(data=data, trades=trades)
+    res = sim.simulate(trader)
+
+    rows = []
+    stats = res.stats() if res is not None else None
+    for product in sim.product + ['total']:
+        row = {'config': n, **config, 'day': day, 'product': product}
+        if res is None:
+            row.update(pnl=np.nan, fills=0, max_position=np.nan, breach=True)
+        else:
+            s = stats.loc[product]
+            row.update(pnl=s['pnl'], fills=int(s['buys'] + s['sells']), max_position=s['max_position'], breach=False)
+        rows.append(row)
+    return rows
+
+
+def sweep(trader_cls, params, days, processes=None):
+    """
+    Backtest every combination of <params> on every day in a process pool.
+    :param trader_cls: Trader class; its module must be importable by the workers.
+    :param params: Mapping of 'CLASS.attr' (or 'attr' on the Trader itself) to candidate values.
+    :param days: Mapping of day label to a prices csv or a (prices csv, trades csv) pair, or a list of those.
+    :param processes: Worker count, defaults to os.cpu_count().
+    :return: Tidy DataFrame with one row per config, day and product.
+    """
+    if not isinstance(days, dict):
+        days = {os.path.basename(f[0] if isinstance(f, (tuple, list)) else f): f for f in days}
+
+    configs = grid(params)
+    tasks = [(n, trader_cls, config, day) for n, config in enumerate(configs) for day in days]
+
+    ctx = mp.get_context('fork') if 'fork' in mp.get_all_start_methods() else mp.get_context()
+    if ctx.get_start_method() == 'fork':
+        _init(days)
+
+    rows = []
+    try:
+        with ctx.Pool(processes, initializer=_init, initargs=(days,)) as pool:
+            for r in pool.imap_unordered(_run, tasks):
+                rows.extend(r)
+    finally:
+        _DAYS.clear()
+
+    return pd.DataFrame(rows).sort_values(['config', 'day', 'product'], kind='stable').reset_index(drop=True)
+
+
+def _parse_param(text):
+    key, _, values = text.partition('=')
+    parsed = []
+    for v in values.split(','):
+        try:
+            parsed.append(json.loads(v))
+        except json.JSONDecodeError:
+            parsed.append(v)
+    return key, parsed
+
+
+def main(argv):
+    arg_parser = argparse.ArgumentParser('Parameter sweep')
+    arg_parser.add_argument('trader', help='Trader class as module.Class, e.g. round1_11.Trader')
+    arg_parser.add_argument('days', nargs='+', help='Prices csv files')
+    arg_parser.add_argument('-t', dest='trades', nargs='+', default=None, help='Trades csv files, one per prices file')
+    arg_parser.add_argument('-p', dest='params', action='append', default=[], help='CLASS.attr=v1,v2,...')
+    arg_parser.add_argument('-j', dest='processes', type=int, default=None, help='Worker processes')
+    arg_parser.add_argument('-o', dest='output', default=None, help='Output csv file')
+    args = arg_parser.parse_args(argv)
+
+    module_name, _, cls_name = args.trader.rpartition('.')
+    trader_cls = getattr(importlib.import_module(module_name), cls_name)
+    params = dict(_parse_param(p) for p in args.params)
+
+    days = list(zip(args.days, args.trades)) if args.trades is not None else args.days
+
+    table = sweep(trader_cls, params, days, args.processes)
+    if args.output is not None:
+        table.to_csv(args.output, index=False)
+    else:
+        logging.info(table.to_string())
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,98 @@
+from bisect import bisect_right
+from dataclasses import dataclass
+import numpy as np
+import pandas as pd
+from sweep import grid
+
+
+@dataclass
+class BatchResult:
+    """Per-tick arrays of one product's vectorized backtest"""
+
+    timestamp: np.ndarray
+    position: np.ndarray
+    bought: np.ndarray
+    sold: np.ndarray
+    cash: np.ndarray
+    pnl: np.ndarray
+    fills: np.ndarray
+
+
+class FixedFairValueRule:
+    """
+    Take logic of RAINFOREST_RESIN_STRATEGY as array rules: buy asks at or below
+    <fair_value> and sell bids at or above it, shading the price that would grow
+    the position by <skew> once |position| is over <band>.
+    """
+
+    def __init__(self, fair_value=10000, band=25, skew=1):
+        self.fair_value = fair_value
+        self.band = band
+        self.skew = skew
+        # Position regimes: short beyond band, inside band, long beyond band.
+        self.bands = [-band, band + 1]
+
+    def prices(self, n):
+        fv, skew = self.fair_value, self.skew
+        buy = np.array([fv, fv, fv - skew], dtype=np.float64)
+        sell = np.array([fv + skew, fv, fv], dtype=np.float64)
+        return np.broadcast_to(buy, (n, 3)), np.broadcast_to(sell, (n, 3))
+
+
+def _take(prices, volumes, limits, ok):
+    """Volume available at each tick and regime from levels whose price passes <ok> against <limits>"""
+    eligible = ok(prices[:, None, :], limits[:, :, None]) & (volumes[:, None, :] > 0)
+    return (volumes[:, None, :] * eligible).sum(axis=-1)
+
+
+def _walk(quantity, prices, volumes):
+    """Notional and number of level fills of taking <quantity> from best-first levels"""
+    before = np.cumsum(volumes, axis=1) - volumes
+    taken = np.clip(quantity[:, None] - before, 0, volumes)
+    return (taken * np.nan_to_num(prices)).sum(axis=1), (taken > 0).sum(axis=1)
+
+
+def simulate_quotes(data, product, rule, limit=50):
+    """
+    Backtest a take-only rule for one product over a whole MarketData day.
+    Book scans are vectorized across ticks and position regimes; only the position
+    recursion, which the limit makes path-dependent, runs tick by tick.
+    Fills follow the cross-only model of the Simulator: orders only trade against the visible book.
+    """
+    rows = data.product_code == data.products.index(product)
+    bid_price, ask_price = data.bid_price[rows], data.ask_price[rows]
+    bid_volume = np.nan_to_num(data.bid_volume[rows])
+    ask_volume = np.nan_to_num(np.abs(data.ask_volume[rows]))
+    mid = data.mid_price[rows]
+    n = len(mid)
+
+    buy_limit, sell_limit = rule.prices(n)
+    can_buy = _take(ask_price, ask_volume, buy_limit, np.less_equal).astype(np.int64).tolist()
+    can_sell = _take(bid_price, bid_volume, sell_limit, np.greater_equal).astype(np.int64).tolist()
+
+    bands = rule.bands
+    bought = np.zeros(n, dtype=np.int64)
+    sold = np.zeros(n, dtype=np.int64)
+    position = np.zeros(n, dtype=np.int64)
+
+    pos = 0
+    for t in range(n):
+        k = bisect_right(bands, pos)
+        b = min(limit - pos, can_buy[t][k])
+        s = min(limit + pos, can_sell[t][k])
+        pos += b - s
+        bought[t], sold[t], position[t] = b, s, pos
+
+    sell_notional, sell_fills = _walk(sold, bid_price, bid_volume)
+    buy_notional, buy_fills = _walk(bought, ask_price, ask_volume)
+    cash = np.cumsum(sell_notional - buy_notional)
+    return BatchResult(data.timestamp[rows], position, bought, sold, cash, cash + position * mid, sell_fills + buy_fills)
+
+
+def scan(data, product, rule_cls, params, limit=50):
+    """Final PnL, fills and max position of <rule_cls> for every combination of <params>"""
+    rows = []
+    for config in grid(params):
+        res = simulate_quotes(data, product, rule_cls(**config), limit)
+        rows.append({**config, 'pnl': res.pnl[-1], 'fills': int(res.fills.sum()), 'max_position': int(np.abs(res.position).max())})
+    return pd.DataFrame(rows)
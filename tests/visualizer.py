@@ -1,11 +1,10 @@
 import numpy as np
 import pandas as pd
-from collections import defaultdict
-import jsonpickle as jp
-import matplotlib.pyplot as plt
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from datacache import read_frame
+from logreader import read_log
+import lod
+from lod import LOD_POINTS
+from chartdata import by_product, histogram, position, book_points, trade_points, wavg_mid_price, concat
 
 
 class Visualizer:
@@ -21,22 +20,23 @@ class Visualizer:
                 self.buy_orders = None
                 self.sell_orders = None
 
-    def __init__(self, log_file, tmp_file=r"/Users/ysc/Desktop/imcProsperity/cache/tmp_v_.csv"):
-        with open(log_file) as f:
-            tmp = f.read()
-            start = tmp.find("Activities log:") + 16
-            end = tmp.find("\n\n\n\n", start)
-            tmp = tmp[start:end]
-        with open(tmp_file, mode='w') as f:
-            f.write(tmp)
-        self.df = pd.read_csv(tmp_file, sep=";")
+    def __init__(self, log_file):
+        self.df, trades = read_log(log_file)
         self.timestamp = np.arange(0, self.df['timestamp'].max() + 100, 100)
-
-        with open(log_file) as f:
-            o = f.read()
-            start = o.find("Trade History:\n")   
-            o = o[start+15:]  
-        self.transaction_log = [self.tradelog(l) for l in jp.decode(o)]
+        self.transaction_log = [self.tradelog(l) for l in trades.to_dict('records')] if trades is not None else []
+
+        # Per-product indexes sorted by tick, so plots only touch the requested window.
+        self.books = by_product(self.df)
+        self.trade_hists, self.positions = dict(), dict()
+        if trades is None:
+            trades = pd.DataFrame({k: [] for k in ('timestamp', 'buyer', 'seller', 'symbol', 'price', 'quantity')})
+        sell = trades['seller'] == "SUBMISSION"
+        buy = (trades['buyer'] == "SUBMISSION") & ~sell
+        for product in self.books:
+            rows = trades['symbol'] == product
+            hists = histogram(trades[rows & buy]), histogram(trades[rows & sell]), histogram(trades[rows & ~buy & ~sell])
+            self.trade_hists[product] = hists
+            self.positions[product] = position(hists[0], hists[1], len(self.timestamp))
 
     @staticmethod
     def calculate_wavg_midprice(order_depth):
@@ -55,89 +55,30 @@ class Visualizer:
         return wavg_price
 
     def plot_static(self, product, start_timestamp = 0, end_timestamp = 100, display_mid_price=True, display_book=True, display_pos=True, display_my_order=True, display_other_order=True):
-        my_buy_hist, my_sell_hist, other_hist = defaultdict(lambda : defaultdict(float)), defaultdict(lambda : defaultdict(float)), defaultdict(lambda : defaultdict(float))
-        cnt_buy = cnt_sell = 0
-        for l in self.transaction_log:
-            if l.symbol == product:
-                if l.seller == "SUBMISSION":
-                    my_sell_hist[l.timestamp // 100][l.price] += l.quantity
-                    cnt_sell += 1
-                elif l.buyer == "SUBMISSION":
-                    my_buy_hist[l.timestamp // 100][l.price] += l.quantity
-                    cnt_buy += 1
-                else:
-                    other_hist[l.timestamp // 100][l.price] += l.quantity
-                     
-        pos = [0]
-        mid_price = []
-        for ts in self.timestamp:
-            cur, idx =0, ts / 100
-            if idx in my_buy_hist:
-                for _, v in my_buy_hist[idx].items():
-                    cur += v
-            if idx in my_sell_hist:
-                for _, v in my_sell_hist[idx].items():
-                    cur -= v
-            pos += [pos[-1] + cur]
-
-        df = self.df[self.df['product'] == product]
-        df.reset_index(inplace=True)
+        import matplotlib.pyplot as plt
+
+        my_buy_hist, my_sell_hist, other_hist = self.trade_hists[product]
+        pos = self.positions[product]
+
+        df = self.books[product].window(start_timestamp, end_timestamp)
+        mid_price = wavg_mid_price(df)
 
         _, ax = plt.subplots(figsize=(20, 12))
-        order_depth_ = self.OrderDepth()
-
-        for _, row in df.iterrows():
-
-            idx = row['timestamp'] // 100
-            if idx < start_timestamp:
-                    continue
-            if idx > end_timestamp:
-                    break
-
-            idx = row['timestamp'] // 100
-            dict_ = dict()
-            
-            for i in (1, 2, 3):
-                if row[f'bid_volume_{i}'] != 0 and not np.isnan(row[f'bid_volume_{i}']):
-                    if display_book:
-                        ax.scatter(idx, row[f'bid_price_{i}'], c='blue', s=row[f'bid_volume_{i}'])
-                    dict_[row[f'bid_price_{i}']] = row[f'bid_volume_{i}']
-            order_depth_.buy_orders = dict_
-            dict_ = dict()
-            for i in (1, 2, 3):
-                if row[f'ask_volume_{i}'] != 0 and not np.isnan(row[f'ask_volume_{i}']):
-                    if display_book:
-                        ax.scatter(idx, row[f'ask_price_{i}'], c='red', s=row[f'ask_volume_{i}'])
-                    dict_[row[f'ask_price_{i}']] = -row[f'ask_volume_{i}']
-            order_depth_.sell_orders = dict_
-            mid_price += [self.calculate_wavg_midprice(order_depth_)]
-
-        for k, v in my_sell_hist.items():
-            if k < start_timestamp:
-                continue
-            if k > end_timestamp:
-                break
-            for p, q in v.items():
-                if display_my_order:
-                    ax.scatter(k, p, c='cornflowerblue', marker='X', alpha=0.5, s=q*50)
-
-        for k, v in my_buy_hist.items():
-            if k < start_timestamp:
-                continue
-            if k > end_timestamp:
-                break
-            for p, q in v.items():
-                if display_my_order:
-                    ax.scatter(k, p, c='tomato', marker='X', alpha=0.5, s=q*50)
-
-        for k, v in other_hist.items():
-            if k < start_timestamp:
-                continue
-            if k > end_timestamp:
-                break
-            for p, q in v.items():
-                if display_other_order:
-                    ax.scatter(k, p, c='grey', marker='X', alpha=0.5, s=q*50)
+
+        if display_book:
+            book = book_points(df)
+            for label, color in (('Bid Book', 'blue'), ('Ask Book', 'red')):
+                points = book[book['Type 1'] == label]
+                ax.scatter(points['idx'], points['Price'], c=color, s=points['Quantity'])
+
+        series = []
+        if display_my_order:
+            series += [(my_sell_hist, 'cornflowerblue'), (my_buy_hist, 'tomato')]
+        if display_other_order:
+            series += [(other_hist, 'grey')]
+        for hist, color in series:
+            points = trade_points(hist, start_timestamp, end_timestamp, None)
+            ax.scatter(points['idx'], points['Price'], c=color, marker='X', alpha=0.5, s=points['Quantity'] * 50)
 
         if display_mid_price:
             ax.plot(self.timestamp[start_timestamp:end_timestamp + 1] / 100, mid_price, '-o', c='lime')
@@ -148,138 +89,45 @@ class Visualizer:
 
     
     def plot_interactive(self, product, start_timestamp = 0, end_timestamp = 100, display_book=True, display_my_order=True, display_other_order=True):
-        my_buy_hist, my_sell_hist, other_hist = defaultdict(lambda : defaultdict(float)), defaultdict(lambda : defaultdict(float)), defaultdict(lambda : defaultdict(float))
-        cnt_buy = cnt_sell = 0
-        for l in self.transaction_log:
-            if l.symbol == product:
-                if l.seller == "SUBMISSION":
-                    my_sell_hist[l.timestamp // 100][l.price] += l.quantity
-                    cnt_sell += 1
-                elif l.buyer == "SUBMISSION":
-                    my_buy_hist[l.timestamp // 100][l.price] += l.quantity
-                    cnt_buy += 1
-                else:
-                    other_hist[l.timestamp // 100][l.price] += l.quantity
-                     
-        pos = [0]
-        for ts in self.timestamp:
-            cur, idx =0, ts / 100
-            if idx in my_buy_hist:
-                for _, v in my_buy_hist[idx].items():
-                    cur += v
-            if idx in my_sell_hist:
-                for _, v in my_sell_hist[idx].items():
-                    cur -= v
-            pos += [pos[-1] + cur]
-
-        df = self.df[self.df['product'] == product]
-        df.reset_index(inplace=True)
-
-        order_depth_ = self.OrderDepth()
-        memo = pd.DataFrame(columns=['idx', 'Price', 'Quantity', 'Type 1', 'Type 2'])
-
-        for _, row in df.iterrows():
-
-            idx = row['timestamp'] // 100
-            if idx < start_timestamp:
-                continue
-            if idx > end_timestamp:
-                break
-
-            idx = row['timestamp'] // 100
-            dict_ = dict()
-            for i in (1, 2, 3):
-                if row[f'bid_volume_{i}'] != 0 and not np.isnan(row[f'bid_volume_{i}']):
-                    if display_book:
-                        memo.loc[len(memo)] = [idx, row[f'bid_price_{i}'], row[f'bid_volume_{i}'], 'Bid Book', '1']
-                    dict_[row[f'bid_price_{i}']] = row[f'bid_volume_{i}']
-            order_depth_.buy_orders = dict_
-            dict_ = dict()
-            for i in (1, 2, 3):
-                if row[f'ask_volume_{i}'] != 0 and not np.isnan(row[f'ask_volume_{i}']):
-                    if display_book:
-                        memo.loc[len(memo)] = [idx, row[f'ask_price_{i}'], row[f'ask_volume_{i}'], 'Ask Book', '1']
-                    dict_[row[f'ask_price_{i}']] = -row[f'ask_volume_{i}']
-            order_depth_.sell_orders = dict_
-
-
-        for k, v in my_sell_hist.items():
-            if k < start_timestamp:
-                continue
-            if k > end_timestamp:
-                break
-            for p, q in v.items():
-                if display_my_order:
-                    memo.loc[len(memo)] = [k, p, q, 'My Ask', '2']
-
-        for k, v in my_buy_hist.items():
-            if k < start_timestamp:
-                continue
-            if k > end_timestamp:
-                break
-            for p, q in v.items():
-                if display_my_order:
-                    memo.loc[len(memo)] = [k, p, q, 'My Bid', '2']
-
-        for k, v in other_hist.items():
-            if k < start_timestamp:
-                continue
-            if k > end_timestamp:
-                break
-            for p, q in v.items():
-                if display_other_order:
-                    memo.loc[len(memo)] = [k, p, q, 'Others', '2']
+        import plotly.express as px
+
+        my_buy_hist, my_sell_hist, other_hist = self.trade_hists[product]
+
+        df = self.books[product].window(start_timestamp, end_timestamp)
 
+        frames = []
+        if display_book:
+            frames.append(book_points(df))
+        if display_my_order:
+            frames.append(trade_points(my_sell_hist, start_timestamp, end_timestamp, 'My Ask'))
+            frames.append(trade_points(my_buy_hist, start_timestamp, end_timestamp, 'My Bid'))
+        if display_other_order:
+            frames.append(trade_points(other_hist, start_timestamp, end_timestamp, 'Others'))
+
+        memo = concat(frames)
         fig = px.scatter(memo, x="idx", y="Price", color="Type 1", size='Quantity', symbol='Type 2', width=1800, height=800)
         fig.show()
         return memo
 
 
-    def plot_pnl(self, product, start_timestamp = 0, end_timestamp = 10000):
+    def plot_pnl(self, product, start_timestamp = 0, end_timestamp = 10000, max_points=LOD_POINTS):
+        from plotly.subplots import make_subplots
 
         fig = make_subplots(specs=[[{"secondary_y": True}]])
 
         # Position
-        my_buy_hist, my_sell_hist = defaultdict(lambda : defaultdict(float)), defaultdict(lambda : defaultdict(float))
-        cnt_buy = cnt_sell = 0
-        for l in self.transaction_log:
-            if l.symbol == product:
-                if l.seller == "SUBMISSION":
-                    my_sell_hist[l.timestamp // 100][l.price] += l.quantity
-                    cnt_sell += 1
-                elif l.buyer == "SUBMISSION":
-                    my_buy_hist[l.timestamp // 100][l.price] += l.quantity
-                    cnt_buy += 1
-                     
-        pos = [0]
-        for ts in self.timestamp:
-            cur, idx =0, ts / 100
-            if idx in my_buy_hist:
-                for _, v in my_buy_hist[idx].items():
-                    cur += v
-            if idx in my_sell_hist:
-                for _, v in my_sell_hist[idx].items():
-                    cur -= v
-            pos += [pos[-1] + cur]
+        pos = self.positions[product]
 
         chart_idx = np.arange(start_timestamp, min(end_timestamp, self.timestamp[-1] / 100 + 1), 1)
-        fig.add_trace(go.Scatter(x=chart_idx, y=pos[start_timestamp+1:end_timestamp+1], name="Position"), secondary_y=False)
+        position = chart_idx, pos[start_timestamp+1:end_timestamp+1]
+        fig.add_trace(lod.scatter(*position, max_points=max_points, name="Position"), secondary_y=False)
 
         # PnL
-        df = self.df[self.df['product'] == product]
-        df.reset_index(inplace=True)
-        pnl = [0]
-        for _, row in df.iterrows():
-            idx = row['timestamp'] // 100
-            if idx < start_timestamp:
-                    continue
-            if idx > end_timestamp:
-                    break
-
-            pnl += [row["profit_and_loss"]]
-
-        fig.add_trace(go.Scatter(x=chart_idx, y=pnl[start_timestamp+1:end_timestamp+1], name="PnL"), secondary_y=True)
-        fig.show()
+        df = self.books[product].window(start_timestamp, end_timestamp)
+        # The window already starts at start_timestamp, so it lines up with chart_idx as is.
+        pnl = chart_idx, df["profit_and_loss"].to_numpy()[:len(chart_idx)]
+        fig.add_trace(lod.scatter(*pnl, max_points=max_points, name="PnL"), secondary_y=True)
+        lod.show(fig, [position, pnl], max_points=max_points)
 
 
 
@@ -299,9 +147,12 @@ class VisualizerRaw:
 
     def __init__(self, prices_csv_file, trades_csv_file):
 
-        self.df_prices = pd.read_csv(prices_csv_file, sep=";")
+        self.df_prices = read_frame(prices_csv_file, sep=";")
         self.timestamp = np.arange(0, self.df_prices['timestamp'].max() + 100, 100)
-        self.df_trades = pd.read_csv(trades_csv_file, sep=";")
+        self.df_trades = read_frame(trades_csv_file, sep=";")
+
+        self.books = by_product(self.df_prices)
+        self.trade_hists = {p: histogram(g) for p, g in self.df_trades.groupby('symbol', sort=False)}
 
 
     @staticmethod
@@ -322,51 +173,18 @@ class VisualizerRaw:
 
     
     def plot_interactive(self, product, start_timestamp = 0, end_timestamp = 100, display_book=True, display_order=True):
-        
-        other_hist = defaultdict(lambda : defaultdict(float))
-        df = self.df_trades[self.df_trades['symbol'] == product]
-        for _, row in df.iterrows():
-            other_hist[row['timestamp'] / 100][row['price']] += row['quantity']
-                     
-        df = self.df_prices[self.df_prices['product'] == product]
-        df.reset_index(inplace=True)
-
-        order_depth_ = self.OrderDepth()
-        memo = pd.DataFrame(columns=['idx', 'Price', 'Quantity', 'Type 1', 'Type 2'])
-
-        for _, row in df.iterrows():
-
-            idx = row['timestamp'] // 100
-            if idx < start_timestamp:
-                continue
-            if idx > end_timestamp:
-                break
-
-            idx = row['timestamp'] // 100
-            dict_ = dict()
-            for i in (1, 2, 3):
-                if row[f'bid_volume_{i}'] != 0 and not np.isnan(row[f'bid_volume_{i}']):
-                    if display_book:
-                        memo.loc[len(memo)] = [idx, row[f'bid_price_{i}'], row[f'bid_volume_{i}'], 'Bid Book', '1']
-                    dict_[row[f'bid_price_{i}']] = row[f'bid_volume_{i}']
-            order_depth_.buy_orders = dict_
-            dict_ = dict()
-            for i in (1, 2, 3):
-                if row[f'ask_volume_{i}'] != 0 and not np.isnan(row[f'ask_volume_{i}']):
-                    if display_book:
-                        memo.loc[len(memo)] = [idx, row[f'ask_price_{i}'], row[f'ask_volume_{i}'], 'Ask Book', '1']
-                    dict_[row[f'ask_price_{i}']] = -row[f'ask_volume_{i}']
-            order_depth_.sell_orders = dict_
-
-        for k, v in other_hist.items():
-            if k < start_timestamp:
-                continue
-            if k > end_timestamp:
-                break
-            for p, q in v.items():
-                if display_order:
-                    memo.loc[len(memo)] = [k, p, q, 'Others', '2']
+        import plotly.express as px
+
+        other_hist = self.trade_hists.get(product, histogram(self.df_trades.iloc[:0]))
+        df = self.books[product].window(start_timestamp, end_timestamp)
+
+        frames = []
+        if display_book:
+            frames.append(book_points(df))
+        if display_order:
+            frames.append(trade_points(other_hist, start_timestamp, end_timestamp, 'Others'))
 
+        memo = concat(frames)
         fig = px.scatter(memo, x="idx", y="Price", color="Type 1", size='Quantity', symbol='Type 2', width=1800, height=800)
         fig.show()
         return memo